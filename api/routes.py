@@ -3,20 +3,84 @@ API Routes for AI Fitness Coach
 RESTful API endpoints with comprehensive error handling and validation
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, current_app, send_file
 from werkzeug.utils import secure_filename
 import os
 import uuid
-import json
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, Tuple
 
 from utils.logger import logger, log_function_call
+from utils.serialization import dumps, loads, dump_file, json_response, static_json, cached_json_response
 from config import Config
 
 # Create API blueprint
 api = Blueprint('api', __name__, url_prefix='/api/v1')
 
+# Results are written on every analysis; create the directory once
+os.makedirs('static/results', exist_ok=True)
+
+# Directory file counts keyed by path, invalidated by directory mtime
+_stats_cache: Dict[str, Tuple[float, int]] = {}
+
+def _count_files(dirpath: str, predicate: Callable[[str], bool]) -> int:
+    """Count matching files in a directory, re-scanning only when it changes
+    
+    Dot-prefixed names are in-progress temp files and are never counted.
+    """
+    try:
+        mtime = os.stat(dirpath).st_mtime
+    except FileNotFoundError:
+        return 0
+    
+    cached = _stats_cache.get(dirpath)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    with os.scandir(dirpath) as entries:
+        count = sum(1 for entry in entries
+                    if not entry.name.startswith('.') and entry.is_file() and predicate(entry.name))
+    _stats_cache[dirpath] = (mtime, count)
+    return count
+
+# Supported exercises
+SUPPORTED_EXERCISES = [
+    {
+        'name': 'squat',
+        'display_name': 'Squat',
+        'description': 'Lower body compound exercise',
+        'muscle_groups': ['quadriceps', 'glutes', 'hamstrings'],
+        'difficulty': 'beginner'
+    },
+    {
+        'name': 'pushup',
+        'display_name': 'Push-up',
+        'description': 'Upper body pushing exercise',
+        'muscle_groups': ['chest', 'triceps', 'shoulders'],
+        'difficulty': 'beginner'
+    },
+    {
+        'name': 'bicep_curl',
+        'display_name': 'Bicep Curl',
+        'description': 'Isolation exercise for biceps',
+        'muscle_groups': ['biceps'],
+        'difficulty': 'beginner'
+    },
+    {
+        'name': 'plank',
+        'display_name': 'Plank',
+        'description': 'Core stability exercise',
+        'muscle_groups': ['core', 'shoulders'],
+        'difficulty': 'beginner'
+    }
+]
+
+# The exercise list never changes, so encode the response once at import
+_EXERCISES_BODY, _EXERCISES_ETAG = static_json({
+    'success': True,
+    'exercises': SUPPORTED_EXERCISES
+})
+
 def validate_file_upload(file) -> Dict[str, Any]:
     """Validate uploaded file"""
     if not file:
@@ -33,7 +97,7 @@ def validate_file_upload(file) -> Dict[str, Any]:
 @api.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return json_response({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'version': '1.0.0',
@@ -47,13 +111,13 @@ def upload_video():
     try:
         # Validate request
         if 'video' not in request.files:
-            return jsonify({'error': 'No video file provided'}), 400
+            return json_response({'error': 'No video file provided'}, 400)
         
         file = request.files['video']
         validation = validate_file_upload(file)
         
         if not validation['valid']:
-            return jsonify({'error': validation['error']}), 400
+            return json_response({'error': validation['error']}, 400)
         
         # Generate unique filename
         filename = validation['filename']
@@ -66,17 +130,17 @@ def upload_video():
         # Save file
         file.save(filepath)
         
-        logger.info(f"Video uploaded successfully", filename=unique_filename)
+        logger.info("Video uploaded successfully", upload_filename=unique_filename)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'filename': unique_filename,
             'message': 'Video uploaded successfully'
         })
         
     except Exception as e:
-        logger.error(f"Upload failed: {str(e)}")
-        return jsonify({'error': 'Upload failed'}), 500
+        logger.error("Upload failed: %s", e)
+        return json_response({'error': 'Upload failed'}, 500)
 
 @api.route('/analyze', methods=['POST'])
 @log_function_call
@@ -86,44 +150,45 @@ def analyze_video():
         data = request.get_json()
         
         if not data or 'filename' not in data:
-            return jsonify({'error': 'Filename required'}), 400
+            return json_response({'error': 'Filename required'}, 400)
         
         filename = data['filename']
         filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
         
         if not os.path.exists(filepath):
-            return jsonify({'error': 'File not found'}), 404
+            return json_response({'error': 'File not found'}, 404)
         
-        # Import here to avoid circular imports
-        from app import VideoAnalyzer
+        # Import here to avoid circular imports; the shared analyzer keeps
+        # one MediaPipe graph per process and serializes access to it
+        from app import analyzer
         
-        analyzer = VideoAnalyzer()
         results = analyzer.analyze_video(filepath)
         
         if 'error' in results:
-            return jsonify({'error': results['error']}), 400
+            return json_response({'error': results['error']}, 400)
         
         # Generate session ID
         session_id = str(uuid.uuid4())
         
-        # Save results
-        results_file = f"static/results/{session_id}.json"
-        os.makedirs(os.path.dirname(results_file), exist_ok=True)
-        
-        with open(results_file, 'w') as f:
-            json.dump(results, f, indent=2)
-        
-        logger.info(f"Analysis completed", session_id=session_id, exercise=results.get('exercise_detected'))
-        
-        return jsonify({
+        # Save the response envelope itself so /results can send the file as-is
+        body = dumps({
             'success': True,
             'session_id': session_id,
             'results': results
         })
+        results_file = f"static/results/{session_id}.json"
+        dump_file(body, results_file)
+        
+        logger.info("Analysis completed", session_id=session_id, exercise=results.get('exercise_detected'))
+        
+        return json_response(body)
         
     except Exception as e:
-        logger.error(f"Analysis failed: {str(e)}")
-        return jsonify({'error': 'Analysis failed'}), 500
+        logger.error("Analysis failed: %s", e)
+        return json_response({'error': 'Analysis failed'}, 500)
+
+# Every stored response envelope starts with its success key
+_ENVELOPE_PREFIX = b'{"success"'
 
 @api.route('/results/<session_id>', methods=['GET'])
 @log_function_call
@@ -133,78 +198,41 @@ def get_results(session_id: str):
         results_file = f"static/results/{session_id}.json"
         
         if not os.path.exists(results_file):
-            return jsonify({'error': 'Results not found'}), 404
+            return json_response({'error': 'Results not found'}, 404)
         
-        with open(results_file, 'r') as f:
-            results = json.load(f)
+        # Files saved before the response envelope was stored hold the bare
+        # results; wrap those in memory, leaving the file as it is
+        with open(results_file, 'rb') as f:
+            stored = f.read(len(_ENVELOPE_PREFIX))
+            if stored != _ENVELOPE_PREFIX:
+                return json_response({
+                    'success': True,
+                    'session_id': session_id,
+                    'results': loads(stored + f.read())
+                })
         
-        return jsonify({
-            'success': True,
-            'session_id': session_id,
-            'results': results
-        })
+        # The stored file is already the response body; results never change
+        return send_file(os.path.abspath(results_file), mimetype='application/json',
+                         conditional=True, max_age=3600)
         
     except Exception as e:
-        logger.error(f"Failed to retrieve results: {str(e)}")
-        return jsonify({'error': 'Failed to retrieve results'}), 500
+        logger.error("Failed to retrieve results: %s", e)
+        return json_response({'error': 'Failed to retrieve results'}, 500)
 
 @api.route('/exercises', methods=['GET'])
 def get_supported_exercises():
     """Get list of supported exercises"""
-    exercises = [
-        {
-            'name': 'squat',
-            'display_name': 'Squat',
-            'description': 'Lower body compound exercise',
-            'muscle_groups': ['quadriceps', 'glutes', 'hamstrings'],
-            'difficulty': 'beginner'
-        },
-        {
-            'name': 'pushup',
-            'display_name': 'Push-up',
-            'description': 'Upper body pushing exercise',
-            'muscle_groups': ['chest', 'triceps', 'shoulders'],
-            'difficulty': 'beginner'
-        },
-        {
-            'name': 'bicep_curl',
-            'display_name': 'Bicep Curl',
-            'description': 'Isolation exercise for biceps',
-            'muscle_groups': ['biceps'],
-            'difficulty': 'beginner'
-        },
-        {
-            'name': 'plank',
-            'display_name': 'Plank',
-            'description': 'Core stability exercise',
-            'muscle_groups': ['core', 'shoulders'],
-            'difficulty': 'beginner'
-        }
-    ]
-    
-    return jsonify({
-        'success': True,
-        'exercises': exercises
-    })
+    return cached_json_response(_EXERCISES_BODY, _EXERCISES_ETAG)
 
 @api.route('/stats', methods=['GET'])
 def get_analytics_stats():
     """Get analytics statistics"""
     try:
         # Count analysis sessions
-        results_dir = "static/results"
-        if os.path.exists(results_dir):
-            session_count = len([f for f in os.listdir(results_dir) if f.endswith('.json')])
-        else:
-            session_count = 0
+        session_count = _count_files("static/results", lambda name: name.endswith('.json'))
         
         # Count uploaded videos
-        upload_dir = Config.UPLOAD_FOLDER
-        if os.path.exists(upload_dir):
-            video_count = len([f for f in os.listdir(upload_dir) 
-                             if Config.is_allowed_file(f)])
-        else:
-            video_count = 0
+        video_count = _count_files(Config.UPLOAD_FOLDER, Config.is_allowed_file)
         
         stats = {
             'total_sessions': session_count,
@@ -213,27 +241,27 @@ def get_analytics_stats():
             'uptime': datetime.now().isoformat()
         }
         
-        return jsonify({
+        return json_response({
             'success': True,
             'stats': stats
         })
         
     except Exception as e:
-        logger.error(f"Failed to get stats: {str(e)}")
-        return jsonify({'error': 'Failed to get statistics'}), 500
+        logger.error("Failed to get stats: %s", e)
+        return json_response({'error': 'Failed to get statistics'}, 500)
 
 @api.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
-    return jsonify({'error': 'Endpoint not found'}), 404
+    return json_response({'error': 'Endpoint not found'}, 404)
 
 @api.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
-    logger.error(f"Internal server error: {str(error)}")
-    return jsonify({'error': 'Internal server error'}), 500
+    logger.error("Internal server error: %s", error)
+    return json_response({'error': 'Internal server error'}, 500)
 
 @api.errorhandler(413)
 def too_large(error):
     """Handle file too large errors"""
-    return jsonify({'error': 'File too large'}), 413 
\ No newline at end of file
+    return json_response({'error': 'File too large'}, 413) 
\ No newline at end of file
@@ -1,14 +1,19 @@
-from flask import Flask, render_template, request, jsonify, send_file, current_app
+from flask import Flask, Request, render_template, request, send_file, current_app
 from werkzeug.utils import secure_filename
 import os
+import tempfile
+import logging
 import cv2
 import numpy as np
-import json
 import time
+import threading
+import queue
+import heapq
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import uuid
-from pose_tracker import IntegratedPoseCoach
-from features import extract_comprehensive_features, detect_exercise_type, analyze_form_quality
+from pose_tracker import IntegratedPoseCoach, warm_up_pose
+from features import extract_feature_vector, detect_exercise_type, analyze_form_quality, landmarks_to_array
 
 # Import mediapipe with fallback to mock
 try:
@@ -20,9 +25,31 @@ except ImportError:
 # Import configuration and utilities
 from config import Config, config
 from utils.logger import logger, log_function_call, performance_monitor
+from utils.jit import njit
+from utils.serialization import loads, dump_file, json_response, static_json, cached_json_response
+
+class UploadRequest(Request):
+    """Request whose uploaded files are spooled straight into the upload folder
+    
+    The multipart parser writes each file part into a named temp file there,
+    so handlers can use the file in place instead of copying it with save().
+    Every spooled file is recorded as soon as it is created, so it can be
+    removed even when a truncated body never finishes parsing.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spooled_files = []
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        suffix = os.path.splitext(secure_filename(filename or ''))[1]
+        stream = tempfile.NamedTemporaryFile(suffix=suffix, prefix='.upload-', delete=False,
+                                             dir=current_app.config['UPLOAD_FOLDER'])
+        self.spooled_files.append(stream)
+        return stream
 
 # Create Flask app
 app = Flask(__name__)
+app.request_class = UploadRequest
 
 # Load configuration
 config_name = os.environ.get('FLASK_CONFIG', 'default')
@@ -38,8 +65,13 @@ os.makedirs('logs', exist_ok=True)
 
 class VideoAnalyzer:
     def __init__(self):
-        self.pose = mp.solutions.pose.Pose(**Config.MEDIAPIPE_CONFIG)
+        # Warm the graph at startup so the first upload does not pay for it
+        self.pose = warm_up_pose(mp.solutions.pose.Pose(**Config.MEDIAPIPE_CONFIG))
         self.drawing = mp.solutions.drawing_utils
+        # MediaPipe graphs are not thread-safe; serialize analyses per worker
+        self.lock = threading.Lock()
+        # Key-frame JPEG encoding runs here, in parallel after the frame loop
+        self.io_pool = ThreadPoolExecutor(max_workers=2)
         logger.info("VideoAnalyzer initialized", mediapipe_available=MEDIAPIPE_AVAILABLE)
     
     @log_function_call
@@ -48,7 +80,10 @@ class VideoAnalyzer:
         performance_monitor.start_timer('video_analysis')
         
         try:
-            cap = cv2.VideoCapture(video_path)
+            # Prefer the threaded FFmpeg backend, falling back to OpenCV's default
+            cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+            if not cap.isOpened():
+                cap = cv2.VideoCapture(video_path)
             
             if not cap.isOpened():
                 logger.error("Could not open video file", video_path=video_path)
@@ -75,64 +110,75 @@ class VideoAnalyzer:
             }
             
             exercise_votes = {}
-            frame_count = 0
+            issues_seen = set()
+            recommendations_seen = set()
+            key_frame_heap = []
             
-            try:
-                while True:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    # Process every 3rd frame for efficiency (10 FPS analysis)
-                    if frame_count % Config.FRAME_SKIP != 0:
-                        frame_count += 1
-                        continue
-                    
-                    # Convert to RGB for MediaPipe
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results = self.pose.process(rgb_frame)
-                    
-                    if results.pose_landmarks:
-                        landmarks = results.pose_landmarks.landmark
-                        h, w, _ = frame.shape
+            # Form scores go into a preallocated buffer sized from the frame count
+            form_scores = np.empty(max(total_frames // Config.FRAME_SKIP + 8, 64), dtype=np.int32)
+            score_count = 0
+            
+            # Decode and convert frames on a producer thread so that reading
+            # the next frames overlaps with pose inference on the current one
+            frame_queue = queue.Queue(maxsize=Config.FRAME_QUEUE_SIZE)
+            stop_event = threading.Event()
+            reader = threading.Thread(target=self._read_frames,
+                                      args=(cap, frame_queue, stop_event), daemon=True)
+            
+            with self.lock:
+                reader.start()
+                try:
+                    while True:
+                        item = frame_queue.get()
+                        if item is None:
+                            break
+                        frame_count, frame, rgb_frame, shape = item
                         
-                        # Extract features
-                        features, coords = extract_comprehensive_features(landmarks, (h, w, 3))
+                        results = self.pose.process(rgb_frame)
                         
-                        if features and coords:
-                            # Detect exercise
-                            detected_exercise = detect_exercise_type(features, coords)
-                            exercise_votes[detected_exercise] = exercise_votes.get(detected_exercise, 0) + 1
+                        if results.pose_landmarks:
+                            # Copy landmarks out of the protobuf once per frame
+                            landmarks = landmarks_to_array(results.pose_landmarks.landmark)
                             
-                            # Analyze form
-                            analysis = analyze_form_quality(detected_exercise, features, coords)
+                            # Extract features in source-resolution pixels
+                            features, coords = extract_feature_vector(landmarks, shape)
                             
-                            if analysis:
-                                analysis_results["form_scores"].append(analysis["overall_score"])
-                                analysis_results["issues_detected"].extend(analysis["issues"])
-                                analysis_results["recommendations"].extend(analysis["recommendations"])
+                            if features is not None:
+                                # Detect exercise
+                                detected_exercise = detect_exercise_type(features, coords)
+                                exercise_votes[detected_exercise] = exercise_votes.get(detected_exercise, 0) + 1
                                 
-                                # Store key frames with poor form
-                                if analysis["overall_score"] < 70:
-                                    key_frame_path = f"static/results/key_frame_{frame_count}.jpg"
-                                    cv2.imwrite(key_frame_path, frame)
-                                    analysis_results["key_frames"].append({
-                                        "frame": frame_count,
-                                        "score": analysis["overall_score"],
-                                        "issues": analysis["issues"][:2],  # Top 2 issues
-                                        "image_path": key_frame_path
-                                    })
-                            
-                            analysis_results["frames_analyzed"] += 1
-                    
-                    frame_count += 1
-                    
-                    # Progress update every 100 frames
-                    if frame_count % 100 == 0:
-                        logger.info(f"Processed {frame_count} frames...")
+                                # Analyze form
+                                analysis = analyze_form_quality(detected_exercise, features, coords)
+                                
+                                if analysis:
+                                    if score_count == form_scores.size:
+                                        form_scores = np.concatenate((form_scores, np.empty_like(form_scores)))
+                                    form_scores[score_count] = analysis["overall_score"]
+                                    score_count += 1
+                                    issues_seen.update(analysis["issues"])
+                                    recommendations_seen.update(analysis["recommendations"])
+                                    
+                                    # Keep only the lowest-scoring frames with poor form;
+                                    # each decoded frame is a fresh array, so no copy is needed
+                                    if analysis["overall_score"] < 70:
+                                        entry = (-analysis["overall_score"], frame_count, frame,
+                                                 analysis["issues"][:2])  # Top 2 issues
+                                        if len(key_frame_heap) < Config.MAX_KEY_FRAMES:
+                                            heapq.heappush(key_frame_heap, entry)
+                                        else:
+                                            heapq.heappushpop(key_frame_heap, entry)
+                                
+                                analysis_results["frames_analyzed"] += 1
+                
+                finally:
+                    stop_event.set()
+                    reader.join()
+                    cap.release()
             
-            finally:
-                cap.release()
+            analysis_results["key_frames"] = self._save_key_frames(key_frame_heap)
+            form_scores = form_scores[:score_count]
+            analysis_results["form_scores"] = form_scores.tolist()
             
             # Determine most likely exercise
             if exercise_votes:
@@ -144,15 +190,15 @@ class VideoAnalyzer:
                 analysis_results["confidence"] = confidence
                 
                 # Calculate overall score
-                if analysis_results["form_scores"]:
-                    analysis_results["overall_score"] = int(sum(analysis_results["form_scores"]) / len(analysis_results["form_scores"]))
+                if score_count:
+                    analysis_results["overall_score"] = int(form_scores.mean())
                 
                 # Estimate rep count
-                analysis_results["rep_count"] = self.estimate_rep_count(analysis_results["form_scores"])
+                analysis_results["rep_count"] = self.estimate_rep_count(form_scores)
                 
-                # Remove duplicates from issues and recommendations
-                analysis_results["issues_detected"] = list(set(analysis_results["issues_detected"]))
-                analysis_results["recommendations"] = list(set(analysis_results["recommendations"]))
+                # Issues and recommendations were deduplicated as they arrived
+                analysis_results["issues_detected"] = list(issues_seen)
+                analysis_results["recommendations"] = list(recommendations_seen)
                 
                 # Log analysis completion
                 duration = performance_monitor.end_timer('video_analysis')
@@ -167,35 +213,115 @@ class VideoAnalyzer:
                 return {"error": "No pose landmarks detected in video"}
                 
         except Exception as e:
-            logger.error(f"Error during video analysis: {str(e)}")
+            logger.error("Error during video analysis: %s", e)
             return {"error": f"Analysis failed: {str(e)}"}
     
-    def estimate_rep_count(self, form_scores):
-        """Estimate rep count based on form score patterns"""
-        if len(form_scores) < 10:
-            return 0
-        
-        # Look for patterns of form degradation and recovery
-        threshold = np.mean(form_scores) - np.std(form_scores)
-        low_form_periods = 0
-        in_low_period = False
+    def _save_key_frames(self, key_frame_heap):
+        """Encode the retained key frames in parallel and describe them in frame order"""
+        key_frames = []
+        pending_writes = []
+        for neg_score, frame_count, frame, issues in sorted(key_frame_heap, key=lambda e: e[1]):
+            key_frame_path = f"static/results/key_frame_{frame_count}.jpg"
+            pending_writes.append(self.io_pool.submit(self._write_jpeg, key_frame_path, frame))
+            key_frames.append({
+                "frame": frame_count,
+                "score": -neg_score,
+                "issues": issues,
+                "image_path": key_frame_path
+            })
         
-        for score in form_scores:
-            if score < threshold and not in_low_period:
-                low_form_periods += 1
-                in_low_period = True
-            elif score >= threshold:
-                in_low_period = False
+        for write in pending_writes:
+            write.result()
+        return key_frames
+    
+    @staticmethod
+    def _write_jpeg(path, frame):
+        """Encode a frame as JPEG in memory and write it with unbuffered syscalls"""
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, Config.KEY_FRAME_JPEG_QUALITY])
+        if not ok:
+            return
         
-        return max(0, low_form_periods - 1)  # Subtract 1 for initial setup
+        data = memoryview(buffer).cast('B')
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+    
+    def _read_frames(self, cap, frame_queue, stop_event):
+        """Producer: decode every FRAME_SKIP-th frame, downscale and convert to RGB"""
+        frame_count = 0
+        try:
+            while not stop_event.is_set():
+                # grab() demuxes without decoding; skipped frames are never retrieved
+                if not cap.grab():
+                    break
+                
+                # Process every 3rd frame for efficiency (10 FPS analysis)
+                if frame_count % Config.FRAME_SKIP == 0:
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        break
+                    
+                    # Landmarks are normalized, so keep the source shape for
+                    # denormalization but run inference on a downscaled copy
+                    shape = frame.shape
+                    h, w = shape[:2]
+                    if w > Config.MAX_ANALYSIS_WIDTH:
+                        scale = Config.MAX_ANALYSIS_WIDTH / w
+                        frame = cv2.resize(frame, (Config.MAX_ANALYSIS_WIDTH, int(h * scale)),
+                                           interpolation=cv2.INTER_AREA)
+                    
+                    # Convert to RGB for MediaPipe
+                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    self._put_frame(frame_queue, (frame_count, frame, rgb_frame, shape), stop_event)
+                
+                frame_count += 1
+                
+                # Progress update every 100 frames
+                if frame_count % 100 == 0 and logger.is_enabled_for(logging.INFO):
+                    logger.info("Processed %d frames...", frame_count)
+        except Exception as e:
+            logger.error("Frame reader failed: %s", e)
+        finally:
+            # End-of-stream marker for the consumer
+            self._put_frame(frame_queue, None, stop_event)
+    
+    @staticmethod
+    def _put_frame(frame_queue, item, stop_event):
+        """Block on a full queue without outliving a consumer that has stopped"""
+        while not stop_event.is_set():
+            try:
+                frame_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def estimate_rep_count(self, form_scores):
+        """Estimate rep count based on form score patterns"""
+        return _count_low_form_reps(np.asarray(form_scores, dtype=np.float64))
+
+@njit(cache=True)
+def _count_low_form_reps(scores):
+    """Count recoveries from low-form periods, ignoring the initial setup"""
+    if scores.size < 10:
+        return 0
+    
+    # Look for patterns of form degradation and recovery
+    threshold = scores.mean() - scores.std()
+    below = scores < threshold
+    
+    # Each entry into a low-form period is a rising edge of the mask
+    low_form_periods = int(below[0]) + np.count_nonzero(below[1:] & ~below[:-1])
+    
+    return max(0, low_form_periods - 1)  # Subtract 1 for initial setup
 
 # Global analyzer instance
 analyzer = VideoAnalyzer()
 
-def allowed_file(filename):
-    """Check if file extension is allowed"""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+# Check if file extension is allowed
+allowed_file = Config.is_allowed_file
 
 @app.route('/')
 def index():
@@ -209,22 +335,21 @@ def index():
 @app.route('/upload', methods=['POST'])
 def upload_video():
     if 'video' not in request.files:
-        return jsonify({'error': 'No video file provided'}), 400
+        return json_response({'error': 'No video file provided'}, 400)
     
     file = request.files['video']
     if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+        return json_response({'error': 'No file selected'}, 400)
     
     if not allowed_file(file.filename):
-        return jsonify({'error': 'Invalid file type. Please upload MP4, AVI, MOV, MKV, or WEBM'}), 400
+        return json_response({'error': 'Invalid file type. Please upload MP4, AVI, MOV, MKV, or WEBM'}, 400)
     
     try:
         # Generate unique filename
         filename = f"{uuid.uuid4()}_{secure_filename(file.filename)}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         
-        # Save uploaded file
-        file.save(filepath)
+        # The upload was spooled to disk during parsing; analyze it in place
+        filepath = file.stream.name
         
         # Analyze video
         print(f"Starting analysis of {filename}...")
@@ -238,13 +363,9 @@ def upload_video():
         results_filename = f"{uuid.uuid4()}_results.json"
         results_path = os.path.join('static/results', results_filename)
         
-        with open(results_path, 'w') as f:
-            json.dump(analysis_results, f, indent=2)
-        
-        # Clean up uploaded video
-        os.remove(filepath)
+        dump_file(analysis_results, results_path)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'results_id': results_filename,
             'analysis': analysis_results
@@ -252,19 +373,29 @@ def upload_video():
     
     except Exception as e:
         print(f"Error processing video: {str(e)}")
-        return jsonify({'error': f'Error processing video: {str(e)}'}), 500
+        return json_response({'error': f'Error processing video: {str(e)}'}, 500)
+
+@app.teardown_request
+def remove_spooled_uploads(exc):
+    """Delete the temp files UploadRequest spooled uploads into"""
+    for stream in request.spooled_files:
+        stream.close()
+        try:
+            os.remove(stream.name)
+        except OSError:
+            pass
 
 @app.route('/results/<results_id>')
 def get_results(results_id):
     try:
         results_path = os.path.join('static/results', results_id)
-        with open(results_path, 'r') as f:
-            results = json.load(f)
-        return jsonify(results)
+        with open(results_path, 'rb') as f:
+            results = loads(f.read())
+        return json_response(results)
     except FileNotFoundError:
-        return jsonify({'error': 'Results not found'}), 404
+        return json_response({'error': 'Results not found'}, 404)
     except Exception as e:
-        return jsonify({'error': f'Error loading results: {str(e)}'}), 500
+        return json_response({'error': f'Error loading results: {str(e)}'}, 500)
 
 @app.route('/demo')
 def demo():
@@ -274,39 +405,44 @@ def demo():
 @app.route('/health')
 def health_check():
     """Health check endpoint for monitoring"""
-    return jsonify({
+    return json_response({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'mediapipe_available': MEDIAPIPE_AVAILABLE,
         'version': '1.0.0'
     })
 
-@app.route('/api/docs')
-def api_docs():
-    """API documentation endpoint"""
-    docs = {
-        'title': 'AI Fitness Coach API',
-        'version': '1.0.0',
-        'description': 'RESTful API for AI-powered fitness form analysis',
-        'endpoints': {
-            'POST /upload': {
-                'description': 'Upload and analyze workout video',
-                'parameters': {
-                    'video': 'Video file (MP4, AVI, MOV, MKV, WEBM)'
-                },
-                'response': 'Analysis results with form scores and recommendations'
+# API documentation
+API_DOCS = {
+    'title': 'AI Fitness Coach API',
+    'version': '1.0.0',
+    'description': 'RESTful API for AI-powered fitness form analysis',
+    'endpoints': {
+        'POST /upload': {
+            'description': 'Upload and analyze workout video',
+            'parameters': {
+                'video': 'Video file (MP4, AVI, MOV, MKV, WEBM)'
             },
-            'GET /results/<id>': {
-                'description': 'Retrieve analysis results by ID',
-                'response': 'Stored analysis results'
-            },
-            'GET /health': {
-                'description': 'Health check endpoint',
-                'response': 'System status and availability'
-            }
+            'response': 'Analysis results with form scores and recommendations'
+        },
+        'GET /results/<id>': {
+            'description': 'Retrieve analysis results by ID',
+            'response': 'Stored analysis results'
+        },
+        'GET /health': {
+            'description': 'Health check endpoint',
+            'response': 'System status and availability'
         }
     }
-    return jsonify(docs)
+}
+
+# API documentation never changes, so encode the response once at import
+_API_DOCS_BODY, _API_DOCS_ETAG = static_json(API_DOCS)
+
+@app.route('/api/docs')
+def api_docs():
+    """API documentation endpoint"""
+    return cached_json_response(_API_DOCS_BODY, _API_DOCS_ETAG)
 
 # Register API blueprint
 try:
@@ -321,7 +457,7 @@ def serve_react(path):
     try:
         return send_file('../static/dist/index.html')
     except FileNotFoundError:
-        return jsonify({'error': 'Frontend not built'}), 404
+        return json_response({'error': 'Frontend not built'}, 404)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -8,6 +8,7 @@ import os
 import subprocess
 import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def run_command(command, cwd=None):
@@ -28,6 +29,13 @@ def run_command(command, cwd=None):
         print(f"Error: {e.stderr}")
         return None
 
+def remove_tree(path):
+    """Delete a directory tree, unlinking its files in parallel"""
+    files = [p for p in path.rglob('*') if p.is_file() or p.is_symlink()]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(os.unlink, files))
+    shutil.rmtree(path, ignore_errors=True)
+
 def main():
     """Main build function"""
     print("🚀 Building AI Fitness Coach Frontend...")
@@ -67,22 +75,33 @@ def main():
     # Create static directory if it doesn't exist
     static_dir.mkdir(exist_ok=True)
     
-    # Remove old dist directory if it exists
+    # Swap the old dist directory aside so the new build is published at once
     old_dist = static_dir / "dist"
+    stale_dist = static_dir / "dist.gc"
+    if stale_dist.exists():
+        remove_tree(stale_dist)
     if old_dist.exists():
-        print("\n🗑️  Removing old build...")
-        shutil.rmtree(old_dist)
+        os.rename(old_dist, stale_dist)
     
     # Move the built files to static directory
     print("\n📁 Moving built files...")
     frontend_dist = frontend_dir / "dist"
     if frontend_dist.exists():
-        shutil.move(str(frontend_dist), str(old_dist))
+        try:
+            os.rename(frontend_dist, old_dist)
+        except OSError:
+            # Different filesystems; fall back to a copying move
+            shutil.move(str(frontend_dist), str(old_dist))
         print("✅ Build files moved to static/dist/")
     else:
         print("❌ Build directory not found!")
         sys.exit(1)
     
+    # Remove the old build now that the new one is live
+    if stale_dist.exists():
+        print("\n🗑️  Removing old build...")
+        remove_tree(stale_dist)
+    
     print("\n🎉 Frontend build completed successfully!")
     print("📁 Built files are now in static/dist/")
     print("🌐 You can now run the Flask application with: python app.py")
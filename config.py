@@ -16,7 +16,8 @@ class Config:
     # File Upload Configuration
     MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB
     UPLOAD_FOLDER = 'uploads'
-    ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm', 'mpg', 'mpeg'}
+    ALLOWED_EXTENSIONS = frozenset({'mp4', 'avi', 'mov', 'mkv', 'webm', 'mpg', 'mpeg'})
+    ALLOWED_SUFFIXES = tuple(sorted('.' + ext for ext in ALLOWED_EXTENSIONS))
     
     # MediaPipe Configuration
     MEDIAPIPE_CONFIG = {
@@ -29,6 +30,10 @@ class Config:
     
     # Analysis Configuration
     FRAME_SKIP = 3  # Process every 3rd frame for efficiency
+    FRAME_QUEUE_SIZE = 8  # Frames decoded ahead of pose inference
+    MAX_ANALYSIS_WIDTH = 640  # Downscale wider frames before pose inference
+    MAX_KEY_FRAMES = 5  # Lowest-scoring poor-form frames saved per video
+    KEY_FRAME_JPEG_QUALITY = 80
     MIN_FRAMES_FOR_ANALYSIS = 30
     MAX_ANALYSIS_DURATION = 300  # 5 minutes max
     
@@ -91,8 +96,7 @@ class Config:
     @classmethod
     def is_allowed_file(cls, filename: str) -> bool:
         """Check if file extension is allowed"""
-        return '.' in filename and \
-               filename.rsplit('.', 1)[1].lower() in cls.ALLOWED_EXTENSIONS
+        return filename.lower().endswith(cls.ALLOWED_SUFFIXES)
 
 class DevelopmentConfig(Config):
     """Development configuration"""
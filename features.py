@@ -1,8 +1,8 @@
+import logging
 import math
 import numpy as np
 from collections import deque
-import warnings
-warnings.filterwarnings('ignore')
+from utils.jit import njit, NUMBA_AVAILABLE
 
 # Import mediapipe with fallback to mock
 try:
@@ -11,33 +11,273 @@ try:
 except ImportError:
     from mediapipe_mock import mp, MEDIAPIPE_AVAILABLE
 
+logger = logging.getLogger(__name__)
+
 pose = mp.solutions.pose.PoseLandmark
 
+# Landmarks used for feature extraction, in coordinate-array row order
+LANDMARK_NAMES = (
+    'RIGHT_HIP', 'RIGHT_KNEE', 'RIGHT_ANKLE',
+    'LEFT_HIP', 'LEFT_KNEE', 'LEFT_ANKLE',
+    'RIGHT_SHOULDER', 'RIGHT_ELBOW', 'RIGHT_WRIST',
+    'LEFT_SHOULDER', 'LEFT_ELBOW', 'LEFT_WRIST',
+    'RIGHT_EAR', 'LEFT_EAR', 'NOSE',
+    'RIGHT_HEEL', 'LEFT_HEEL', 'RIGHT_FOOT_INDEX', 'LEFT_FOOT_INDEX'
+)
+NAME_TO_ROW = {name: row for row, name in enumerate(LANDMARK_NAMES)}
+LANDMARK_IDS = {name: int(getattr(pose, name)) for name in LANDMARK_NAMES}
+SELECTED_IDX = np.array([LANDMARK_IDS[name] for name in LANDMARK_NAMES], dtype=np.intp)
+MIN_LANDMARKS = int(SELECTED_IDX.max()) + 1
+
+# Joint angles as (a, b, c) landmark triplets, measured at b
+JOINT_ANGLES = (
+    ('right_knee_angle', 'RIGHT_HIP', 'RIGHT_KNEE', 'RIGHT_ANKLE'),
+    ('left_knee_angle', 'LEFT_HIP', 'LEFT_KNEE', 'LEFT_ANKLE'),
+    ('right_hip_angle', 'RIGHT_SHOULDER', 'RIGHT_HIP', 'RIGHT_KNEE'),
+    ('left_hip_angle', 'LEFT_SHOULDER', 'LEFT_HIP', 'LEFT_KNEE'),
+    ('right_elbow_angle', 'RIGHT_SHOULDER', 'RIGHT_ELBOW', 'RIGHT_WRIST'),
+    ('left_elbow_angle', 'LEFT_SHOULDER', 'LEFT_ELBOW', 'LEFT_WRIST'),
+)
+ANGLE_NAMES = tuple(joint[0] for joint in JOINT_ANGLES)
+JOINT_TRIPLETS = np.array([[NAME_TO_ROW[name] for name in joint[1:]] for joint in JOINT_ANGLES],
+                          dtype=np.intp)
+
+# Hip and shoulder centers as (right, left) landmark rows; they follow the
+# landmark rows in the extractor's body array
+CENTER_PAIRS = np.array([[NAME_TO_ROW['RIGHT_HIP'], NAME_TO_ROW['LEFT_HIP']],
+                         [NAME_TO_ROW['RIGHT_SHOULDER'], NAME_TO_ROW['LEFT_SHOULDER']]], dtype=np.intp)
+HIP_CENTER_ROW = len(LANDMARK_NAMES)
+SHOULDER_CENTER_ROW = len(LANDMARK_NAMES) + 1
+
+# Vertical symmetry and point-to-point distance features as body-row pairs
+SYMMETRY_FEATURES = (
+    ('knee_symmetry', NAME_TO_ROW['RIGHT_KNEE'], NAME_TO_ROW['LEFT_KNEE']),
+    ('hip_symmetry', NAME_TO_ROW['RIGHT_HIP'], NAME_TO_ROW['LEFT_HIP']),
+    ('shoulder_symmetry', NAME_TO_ROW['RIGHT_SHOULDER'], NAME_TO_ROW['LEFT_SHOULDER']),
+)
+DISTANCE_FEATURES = (
+    ('foot_distance', NAME_TO_ROW['RIGHT_FOOT_INDEX'], NAME_TO_ROW['LEFT_FOOT_INDEX']),
+    ('shoulder_hip_distance', SHOULDER_CENTER_ROW, HIP_CENTER_ROW),
+)
+SYMMETRY_PAIRS = np.array([pair[1:] for pair in SYMMETRY_FEATURES], dtype=np.intp)
+DISTANCE_PAIRS = np.array([pair[1:] for pair in DISTANCE_FEATURES], dtype=np.intp)
+
+# Temporal analysis window, assuming 30 FPS input
+HISTORY_LENGTH = 30
+FPS = 30.0
+
+# Frames whose landmarks all moved less than this many pixels, and whose
+# visibilities all changed less than this much, since the last computed frame
+# reuse its features, for at most this many frames in a row
+REUSE_MAX_DELTA_PX = 2.0
+REUSE_MAX_VISIBILITY_DELTA = 0.05
+REUSE_MAX_FRAMES = 3
+
+# Fixed feature-vector layout; a NaN slot means the feature is not available
+FEATURE_NAMES = ANGLE_NAMES + (
+    'spine_angle',
+    'knee_symmetry', 'hip_symmetry', 'shoulder_symmetry',
+    'foot_distance', 'torso_lean', 'shoulder_hip_distance',
+    'avg_visibility', 'min_visibility',
+) + tuple(f'{name}_{suffix}' for name in ANGLE_NAMES for suffix in ('velocity', 'is_fast'))
+FEATURE_INDEX = {name: index for index, name in enumerate(FEATURE_NAMES)}
+FEAT_DIM = len(FEATURE_NAMES)
+ANGLE_SLOTS = np.array([FEATURE_INDEX[name] for name in ANGLE_NAMES], dtype=np.intp)
+VELOCITY_SLOTS = np.array([FEATURE_INDEX[f'{name}_velocity'] for name in ANGLE_NAMES], dtype=np.intp)
+IS_FAST_SLOTS = np.array([FEATURE_INDEX[f'{name}_is_fast'] for name in ANGLE_NAMES], dtype=np.intp)
+SYMMETRY_SLOTS = np.array([FEATURE_INDEX[pair[0]] for pair in SYMMETRY_FEATURES], dtype=np.intp)
+DISTANCE_SLOTS = np.array([FEATURE_INDEX[pair[0]] for pair in DISTANCE_FEATURES], dtype=np.intp)
+SPINE_SLOT = FEATURE_INDEX['spine_angle']
+TORSO_LEAN_SLOT = FEATURE_INDEX['torso_lean']
+AVG_VISIBILITY_SLOT = FEATURE_INDEX['avg_visibility']
+MIN_VISIBILITY_SLOT = FEATURE_INDEX['min_visibility']
+NOSE_ROW = NAME_TO_ROW['NOSE']
+
+@njit(cache=True)
+def calculate_angle_xy(ax, ay, bx, by, cx, cy):
+    """Angle at (bx, by) in degrees from unpacked 2D coordinates
+    
+    Takes plain floats so callers avoid building tuples or arrays; returns 0
+    when either arm has zero length.
+    """
+    bax, bay = ax - bx, ay - by
+    bcx, bcy = cx - bx, cy - by
+    
+    norm_ba = math.hypot(bax, bay)
+    norm_bc = math.hypot(bcx, bcy)
+    if norm_ba == 0 or norm_bc == 0:
+        return 0.0
+    
+    cosine = (bax * bcx + bay * bcy) / (norm_ba * norm_bc)
+    return math.degrees(math.acos(min(1.0, max(-1.0, cosine))))
+
+@njit(cache=True)
+def _angles_batch(a, b, c):
+    """Angles at b in degrees for (N, 2) point arrays, 0 where either arm has zero length"""
+    ba = a - b
+    bc = c - b
+    
+    norms = np.sqrt((ba * ba).sum(axis=1)) * np.sqrt((bc * bc).sum(axis=1))
+    valid = norms != 0
+    cosine = (ba * bc).sum(axis=1) / np.where(valid, norms, 1.0)
+    angles = np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+    return np.where(valid, angles, 0.0)
+
+@njit(cache=True)
+def _feature_kernel(sel, w, h, prev_angles, has_prev, out):
+    """Fill the geometric and temporal slots of out for one frame
+    
+    sel holds the selected landmarks as normalized x, y and visibility rows
+    and is scaled to whole pixels in place; landmarks the model reports as
+    not visible are zeroed.
+    """
+    xy = np.trunc(sel[:, :2] * np.array([w, h], dtype=np.float64)) * (sel[:, 2:] > 0.0)
+    sel[:, :2] = xy
+    
+    # Calculate your original angles in one batched pass
+    angles = _angles_batch(xy[JOINT_TRIPLETS[:, 0]], xy[JOINT_TRIPLETS[:, 1]], xy[JOINT_TRIPLETS[:, 2]])
+    out[ANGLE_SLOTS] = angles
+    
+    # Hip and shoulder centers, appended after the landmark rows
+    centers = 0.5 * (xy[CENTER_PAIRS[:, 0]] + xy[CENTER_PAIRS[:, 1]])
+    body = np.concatenate((xy, centers))
+    
+    # Spine alignment
+    nose = body[NOSE_ROW]
+    out[SPINE_SLOT] = calculate_angle_xy(nose[0], nose[1], centers[1, 0], centers[1, 1],
+                                         centers[0, 0], centers[0, 1])
+    
+    # Body symmetry, stance width and body proportions
+    out[SYMMETRY_SLOTS] = np.abs(body[SYMMETRY_PAIRS[:, 0], 1] - body[SYMMETRY_PAIRS[:, 1], 1])
+    delta = body[DISTANCE_PAIRS[:, 0]] - body[DISTANCE_PAIRS[:, 1]]
+    out[DISTANCE_SLOTS] = np.hypot(delta[:, 0], delta[:, 1])
+    out[TORSO_LEAN_SLOT] = abs(centers[0, 0] - centers[1, 0])
+    
+    # Confidence metrics
+    visibility = sel[:, 2]
+    out[AVG_VISIBILITY_SLOT] = visibility.mean()
+    out[MIN_VISIBILITY_SLOT] = visibility.min()
+    
+    # Temporal features (movement dynamics) against the previous frame
+    if has_prev:
+        velocity = np.abs(angles - prev_angles) * FPS
+        out[VELOCITY_SLOTS] = velocity
+        out[IS_FAST_SLOTS] = np.where(velocity > 100, 1.0, 0.0)  # Fast movement threshold
+    else:
+        out[VELOCITY_SLOTS] = np.nan
+        out[IS_FAST_SLOTS] = np.nan
+
 class AdvancedFeatureExtractor:
     def __init__(self):
-        self.angle_history = deque(maxlen=30)
+        # Ring buffer of recent joint angles; head is the next slot to write
+        self.angle_ring = np.zeros((HISTORY_LENGTH, len(ANGLE_NAMES)))
+        self.head = 0
+        self.count = 0
         self.velocity_history = deque(maxlen=10)
+        self._features = np.full(FEAT_DIM, np.nan)
+        
+        # Temporal feature cache for near-identical consecutive frames
+        self.reuse_max_delta = REUSE_MAX_DELTA_PX
+        self.reuse_max_visibility_delta = REUSE_MAX_VISIBILITY_DELTA
+        self.reuse_max_frames = REUSE_MAX_FRAMES
+        self._reference = None
+        self._reference_size = None
+        self._points = None
+        self._reused = 0
         
     def calculate_angle(self, a, b, c):
         """Enhanced angle calculation with error handling"""
-        a, b, c = np.array(a), np.array(b), np.array(c)
-        ba = a - b
-        bc = c - b
+        if len(a) == 2 and len(b) == 2 and len(c) == 2:
+            return calculate_angle_xy(float(a[0]), float(a[1]), float(b[0]), float(b[1]),
+                                      float(c[0]), float(c[1]))
+        
+        ba = [ai - bi for ai, bi in zip(a, b)]
+        bc = [ci - bi for ci, bi in zip(c, b)]
         
         # Handle zero vectors
-        norm_ba = np.linalg.norm(ba)
-        norm_bc = np.linalg.norm(bc)
+        norm_ba = math.hypot(*ba)
+        norm_bc = math.hypot(*bc)
         
         if norm_ba == 0 or norm_bc == 0:
             return 0
             
-        cosine = np.dot(ba, bc) / (norm_ba * norm_bc)
-        angle = np.arccos(np.clip(cosine, -1.0, 1.0))
-        return round(np.degrees(angle), 2)
+        cosine = sum(u * v for u, v in zip(ba, bc)) / (norm_ba * norm_bc)
+        return math.degrees(math.acos(min(1.0, max(-1.0, cosine))))
+    
+    def calculate_angles_batch(self, a, b, c):
+        """Angles at b in degrees for (N, 2) point arrays, 0 where either arm has zero length"""
+        return _angles_batch(a, b, c)
     
     def calculate_distance(self, p1, p2):
         """Calculate Euclidean distance between two points"""
-        return np.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+        return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
+    
+    def calculate_distances(self, p1, p2):
+        """Row-wise Euclidean distances between two (N, 2) point arrays"""
+        return np.hypot(p1[:, 0] - p2[:, 0], p1[:, 1] - p2[:, 1])
+
+    def extract(self, landmarks, shape):
+        """Fill the preallocated feature vector from one frame of landmarks"""
+        if landmarks is None or len(landmarks) < MIN_LANDMARKS or shape is None or len(shape) < 2:
+            return None, None
+        
+        h, w = shape[:2]
+        
+        if isinstance(landmarks, np.ndarray):
+            points = landmarks
+        else:
+            try:
+                points = landmarks_to_array(landmarks)
+            except (AttributeError, TypeError, ValueError) as e:
+                logger.error("Enhanced feature extraction failed: %s", e)
+                return None, None
+        
+        sel = points[SELECTED_IDX]
+        features = self._features
+        
+        # Reuse the last computed features while the pose holds still; a held
+        # pose is not moving, so its velocities are zero rather than stale
+        if self._can_reuse(sel, w, h):
+            self._reused += 1
+            self.push_angles(features[ANGLE_SLOTS])
+            features[VELOCITY_SLOTS] = 0.0
+            features[IS_FAST_SLOTS] = 0.0
+            return features, self._points
+        
+        self._reference = sel.copy()
+        self._reference_size = (w, h)
+        self._reused = 0
+        
+        # Compute the numeric features, scaling sel to pixels in place
+        prev_angles = self.angle_ring[(self.head - 1) % HISTORY_LENGTH]
+        _feature_kernel(sel, w, h, prev_angles, self.count > 0, features)
+        self.push_angles(features[ANGLE_SLOTS])
+        self._points = sel
+        
+        return features, sel
+    
+    def _can_reuse(self, sel, w, h):
+        """Whether every landmark is within reuse_max_delta pixels and
+        reuse_max_visibility_delta visibility of the last computed frame"""
+        if (self._reference is None or self._reused >= self.reuse_max_frames
+                or self._reference_size != (w, h)):
+            return False
+        reference = self._reference
+        if np.abs(sel[:, 2] - reference[:, 2]).max() >= self.reuse_max_visibility_delta:
+            return False
+        delta = np.abs(sel[:, :2] - reference[:, :2]) * (w, h)
+        return delta.max() < self.reuse_max_delta
+    
+    def push_angles(self, angles):
+        """Record one frame of joint angles in the ring buffer"""
+        self.angle_ring[self.head] = angles
+        self.head = (self.head + 1) % HISTORY_LENGTH
+        self.count = min(self.count + 1, HISTORY_LENGTH)
+
+# Compile the kernel at import rather than on the first analyzed frame
+if NUMBA_AVAILABLE:
+    _feature_kernel(np.zeros((len(LANDMARK_NAMES), 3)), 1, 1,
+                    np.zeros(len(ANGLE_NAMES)), False, np.empty(FEAT_DIM))
 
 # Create global instance for backward compatibility
 feature_extractor = AdvancedFeatureExtractor()
@@ -47,250 +287,208 @@ def calculate_angle(a, b, c):
     """Backward compatible angle calculation"""
     return feature_extractor.calculate_angle(a, b, c)
 
-def extract_comprehensive_features(landmarks, shape):
-    """Enhanced version of your original function"""
-    h, w, _ = shape
+def landmarks_to_array(landmarks):
+    """Copy landmark x, y and visibility into an (N, 3) array in one pass"""
+    return np.fromiter(
+        (value for landmark in landmarks
+         for value in (landmark.x, landmark.y, getattr(landmark, 'visibility', 1.0))),
+        dtype=np.float64,
+        count=len(landmarks) * 3
+    ).reshape(-1, 3)
+
+def extract_feature_vector(landmarks, shape):
+    """Extract the fixed-layout feature vector for one frame
     
-    # Helper function with enhanced error handling
-    def get_landmark_safe(name):
-        try:
-            landmark = landmarks[getattr(pose, name).value]
-            return (
-                int(landmark.x * w), 
-                int(landmark.y * h),
-                landmark.visibility if hasattr(landmark, 'visibility') else 1.0
-            )
-        except:
-            return (0, 0, 0.0)
+    Returns (features, points) where features is indexed by FEATURE_INDEX and
+    is overwritten by the next call, and points holds pixel x, y and
+    visibility per LANDMARK_NAMES row. Returns (None, None) on failure.
+    """
+    return feature_extractor.extract(landmarks, shape)
+
+def extract_comprehensive_features(landmarks, shape):
+    """Enhanced version of your original function
     
-    try:
-        # Extract all landmarks with visibility
-        pts = {}
-        landmark_names = [
-            'RIGHT_HIP', 'RIGHT_KNEE', 'RIGHT_ANKLE',
-            'LEFT_HIP', 'LEFT_KNEE', 'LEFT_ANKLE',
-            'RIGHT_SHOULDER', 'RIGHT_ELBOW', 'RIGHT_WRIST',
-            'LEFT_SHOULDER', 'LEFT_ELBOW', 'LEFT_WRIST',
-            'RIGHT_EAR', 'LEFT_EAR', 'NOSE',
-            'RIGHT_HEEL', 'LEFT_HEEL', 'RIGHT_FOOT_INDEX', 'LEFT_FOOT_INDEX'
-        ]
-        
-        for name in landmark_names:
-            pts[name] = get_landmark_safe(name)
-        
-        # Calculate your original angles
-        angles = {
-            'right_knee_angle': calculate_angle(pts['RIGHT_HIP'][:2], pts['RIGHT_KNEE'][:2], pts['RIGHT_ANKLE'][:2]),
-            'left_knee_angle': calculate_angle(pts['LEFT_HIP'][:2], pts['LEFT_KNEE'][:2], pts['LEFT_ANKLE'][:2]),
-            'right_hip_angle': calculate_angle(pts['RIGHT_SHOULDER'][:2], pts['RIGHT_HIP'][:2], pts['RIGHT_KNEE'][:2]),
-            'left_hip_angle': calculate_angle(pts['LEFT_SHOULDER'][:2], pts['LEFT_HIP'][:2], pts['LEFT_KNEE'][:2]),
-            'right_elbow_angle': calculate_angle(pts['RIGHT_SHOULDER'][:2], pts['RIGHT_ELBOW'][:2], pts['RIGHT_WRIST'][:2]),
-            'left_elbow_angle': calculate_angle(pts['LEFT_SHOULDER'][:2], pts['LEFT_ELBOW'][:2], pts['LEFT_WRIST'][:2]),
-        }
-        
-        # ADD NEW ENHANCED FEATURES
-        # Body alignment and symmetry
-        hip_center = [
-            (pts['RIGHT_HIP'][0] + pts['LEFT_HIP'][0]) / 2,
-            (pts['RIGHT_HIP'][1] + pts['LEFT_HIP'][1]) / 2
-        ]
-        
-        shoulder_center = [
-            (pts['RIGHT_SHOULDER'][0] + pts['LEFT_SHOULDER'][0]) / 2,
-            (pts['RIGHT_SHOULDER'][1] + pts['LEFT_SHOULDER'][1]) / 2
-        ]
-        
-        # Enhanced features that improve accuracy
-        enhanced_features = {
-            # Spine alignment
-            'spine_angle': calculate_angle(
-                pts['NOSE'][:2], 
-                shoulder_center, 
-                hip_center
-            ),
-            
-            # Body symmetry
-            'knee_symmetry': abs(pts['RIGHT_KNEE'][1] - pts['LEFT_KNEE'][1]),
-            'hip_symmetry': abs(pts['RIGHT_HIP'][1] - pts['LEFT_HIP'][1]),
-            'shoulder_symmetry': abs(pts['RIGHT_SHOULDER'][1] - pts['LEFT_SHOULDER'][1]),
-            
-            # Stance and positioning
-            'foot_distance': feature_extractor.calculate_distance(
-                pts['RIGHT_FOOT_INDEX'][:2], 
-                pts['LEFT_FOOT_INDEX'][:2]
-            ),
-            'torso_lean': abs(hip_center[0] - shoulder_center[0]),
-            
-            # Body proportions
-            'shoulder_hip_distance': feature_extractor.calculate_distance(shoulder_center, hip_center),
-            
-            # Confidence metrics
-            'avg_visibility': np.mean([pts[name][2] for name in landmark_names if len(pts[name]) > 2]),
-            'min_visibility': min([pts[name][2] for name in landmark_names if len(pts[name]) > 2]),
-        }
-        
-        # Calculate temporal features (movement dynamics)
-        temporal_features = calculate_temporal_features(angles)
-        
-        # Combine all features
-        all_features = {**angles, **enhanced_features, **temporal_features}
-        
-        return all_features, pts
-        
-    except Exception as e:
-        print(f"[ERROR] Enhanced feature extraction failed: {e}")
+    Accepts either MediaPipe landmarks or the (N, 3) array produced by
+    landmarks_to_array, and returns plain dicts for the legacy API.
+    """
+    features, points = extract_feature_vector(landmarks, shape)
+    if features is None:
         return None, None
+    return features_to_dict(features), points_to_dict(points)
 
-def calculate_temporal_features(current_angles):
-    """Calculate movement velocity and smoothness"""
-    temporal_features = {}
-    
-    # Store angle history for temporal analysis
-    feature_extractor.angle_history.append(current_angles.copy())
-    
-    if len(feature_extractor.angle_history) >= 2:
-        # Calculate angular velocities
-        prev_angles = feature_extractor.angle_history[-2]
-        dt = 1/30.0  # Assuming 30 FPS
-        
-        for joint in current_angles.keys():
-            if joint in prev_angles:
-                velocity = abs(current_angles[joint] - prev_angles[joint]) / dt
-                temporal_features[f'{joint}_velocity'] = velocity
-                
-                # Movement smoothness indicator
-                if velocity > 100:  # Fast movement threshold
-                    temporal_features[f'{joint}_is_fast'] = 1
-                else:
-                    temporal_features[f'{joint}_is_fast'] = 0
-    
-    return temporal_features
+def features_to_dict(features):
+    """Convert a feature vector to the legacy name -> value dict, skipping missing slots"""
+    values = features.tolist()
+    if not np.isnan(features).any():
+        return dict(zip(FEATURE_NAMES, values))
+    return {name: value for name, value in zip(FEATURE_NAMES, values) if value == value}
+
+def features_to_vector(features):
+    """Convert a legacy feature dict to a feature vector, NaN for missing names"""
+    if isinstance(features, np.ndarray):
+        return features
+    return np.array([features.get(name, np.nan) for name in FEATURE_NAMES], dtype=np.float64)
+
+def points_to_dict(points):
+    """Convert a points array to the legacy name -> (x, y, visibility) dict"""
+    return {name: (int(x), int(y), visibility)
+            for name, (x, y, visibility) in zip(LANDMARK_NAMES, points.tolist())}
+
+
+# Derived rule inputs appended after the feature vector, as (name, reduction, right, left)
+DERIVED_FEATURES = (
+    ('avg_knee_angle', 'mean', 'right_knee_angle', 'left_knee_angle'),
+    ('avg_hip_angle', 'mean', 'right_hip_angle', 'left_hip_angle'),
+    ('avg_elbow_angle', 'mean', 'right_elbow_angle', 'left_elbow_angle'),
+    ('max_elbow_angle', 'max', 'right_elbow_angle', 'left_elbow_angle'),
+)
+DERIVED_PAIRS = np.array([[FEATURE_INDEX[right], FEATURE_INDEX[left]]
+                          for _, _, right, left in DERIVED_FEATURES], dtype=np.intp)
+DERIVED_IS_MAX = np.array([reduction == 'max' for _, reduction, _, _ in DERIVED_FEATURES])
+RULE_INDEX = {**FEATURE_INDEX,
+              **{derived[0]: FEAT_DIM + offset for offset, derived in enumerate(DERIVED_FEATURES)}}
+
+_SIGNS = {'<': -1.0, '>': 1.0}
+
+def _rule_inputs(features):
+    """Append the derived joint averages and maxima to a feature vector for rule evaluation"""
+    features = features_to_vector(features)
+    right, left = features[DERIVED_PAIRS[:, 0]], features[DERIVED_PAIRS[:, 1]]
+    derived = np.where(DERIVED_IS_MAX, np.maximum(right, left), (right + left) / 2)
+    return np.concatenate((features, derived))
+
+def _condition_table(conditions):
+    """Pack (input, op, threshold, default) conditions into parallel arrays"""
+    names, ops, thresholds, defaults = zip(*conditions)
+    return (np.array([RULE_INDEX[name] for name in names], dtype=np.intp),
+            np.array([_SIGNS[op] for op in ops]),
+            np.array(thresholds, dtype=np.float64),
+            np.array(defaults, dtype=np.float64))
+
+def _evaluate_conditions(inputs, table):
+    """Evaluate every condition of a table at once, substituting defaults for missing inputs"""
+    index, signs, thresholds, defaults = table
+    values = inputs[index]
+    values = np.where(np.isnan(values), defaults, values)
+    return signs * (values - thresholds) > 0
+
+# Exercise detection rules, checked in order; a missing input takes the
+# default, and NaN defaults fail the condition
+EXERCISE_RULES = (
+    ('squat', (
+        ('avg_knee_angle', '<', 140, np.nan),
+        ('avg_hip_angle', '<', 130, np.nan),
+        ('foot_distance', '>', 40, 0),           # Proper stance
+        ('spine_angle', '>', 160, 180),          # Upright torso
+    )),
+    ('bicep_curl', (
+        ('avg_elbow_angle', '<', 120, np.nan),
+        ('shoulder_hip_distance', '>', 100, 0),  # Standing upright
+        ('torso_lean', '<', 20, 0),              # Not leaning too much
+    )),
+    ('push_up', (
+        ('avg_elbow_angle', '<', 130, np.nan),
+        ('spine_angle', '>', 160, 0),            # Straight body line
+        ('shoulder_hip_distance', '<', 80, 0),   # Horizontal position
+    )),
+    ('plank', (
+        ('spine_angle', '>', 170, 0),
+        ('shoulder_hip_distance', '<', 60, 0),
+    )),
+)
+DETECTION_TABLE = _condition_table([condition for _, conditions in EXERCISE_RULES
+                                    for condition in conditions])
+
+# Rule membership of each condition; the trailing empty row always matches
+# and stands for "unknown"
+DETECTION_MEMBERS = np.arange(len(EXERCISE_RULES) + 1)[:, None] == np.repeat(
+    np.arange(len(EXERCISE_RULES)), [len(conditions) for _, conditions in EXERCISE_RULES])
+DETECTED_EXERCISES = tuple(name for name, _ in EXERCISE_RULES) + ('unknown',)
 
 def detect_exercise_type(features, coords):
-    """Enhanced exercise detection with more criteria"""
+    """Enhanced exercise detection with more criteria
     
-    # Calculate averages
-    avg_knee = (features['right_knee_angle'] + features['left_knee_angle']) / 2
-    avg_hip = (features['right_hip_angle'] + features['left_hip_angle']) / 2
-    avg_elbow = (features['right_elbow_angle'] + features['left_elbow_angle']) / 2
-    
-    # Enhanced squat detection
-    if (avg_knee < 140 and avg_hip < 130 and 
-        features.get('foot_distance', 0) > 40 and  # Proper stance
-        features.get('spine_angle', 180) > 160):   # Upright torso
-        return "squat"
-    
-    # Enhanced bicep curl detection
-    elif (avg_elbow < 120 and 
-          features.get('shoulder_hip_distance', 0) > 100 and  # Standing upright
-          features.get('torso_lean', 0) < 20):  # Not leaning too much
-        return "bicep_curl"
-    
-    # Push-up detection
-    elif (avg_elbow < 130 and 
-          features.get('spine_angle', 0) > 160 and  # Straight body line
-          features.get('shoulder_hip_distance', 0) < 80):  # Horizontal position
-        return "push_up"
-    
-    # Plank detection
-    elif (features.get('spine_angle', 0) > 170 and 
-          features.get('shoulder_hip_distance', 0) < 60):
-        return "plank"
-    
-    return "unknown"
+    Evaluates every rule's conditions in one vectorized pass and returns the
+    first exercise whose conditions all hold.
+    """
+    passed = _evaluate_conditions(_rule_inputs(features), DETECTION_TABLE)
+    matches = (passed | ~DETECTION_MEMBERS).all(axis=1)
+    return DETECTED_EXERCISES[int(np.argmax(matches))]
 
-def analyze_form_quality(exercise, features, coords):
-    """Enhanced form analysis with specific recommendations"""
-    score = 100
-    issues = []
-    recommendations = []
-    
-    if exercise == "squat":
+# Form rules per exercise as (input, op, threshold, default, penalty, issue,
+# recommendation); a rule fires when its condition holds
+FORM_RULES = {
+    'squat': (
         # Knee angle analysis
-        avg_knee = (features['right_knee_angle'] + features['left_knee_angle']) / 2
-        if avg_knee < 60:
-            issues.append("Squatting too deep - risk of knee injury")
-            recommendations.append("Don't go below parallel (90 degrees)")
-            score -= 20
-        elif avg_knee > 140:
-            issues.append("Not squatting deep enough")
-            recommendations.append("Go deeper until thighs are parallel")
-            score -= 15
-        
+        ('avg_knee_angle', '<', 60, np.nan, 20,
+         "Squatting too deep - risk of knee injury", "Don't go below parallel (90 degrees)"),
+        ('avg_knee_angle', '>', 140, np.nan, 15,
+         "Not squatting deep enough", "Go deeper until thighs are parallel"),
         # Hip hinge analysis
-        avg_hip = (features['right_hip_angle'] + features['left_hip_angle']) / 2
-        if avg_hip < 60:
-            issues.append("Hips not hinging properly")
-            recommendations.append("Push hips back more, imagine sitting in a chair")
-            score -= 20
-        
+        ('avg_hip_angle', '<', 60, np.nan, 20,
+         "Hips not hinging properly", "Push hips back more, imagine sitting in a chair"),
         # Torso lean
-        if features.get('torso_lean', 0) > 30:
-            issues.append("Leaning forward too much")
-            recommendations.append("Keep chest up and core engaged")
-            score -= 15
-        
+        ('torso_lean', '>', 30, 0, 15,
+         "Leaning forward too much", "Keep chest up and core engaged"),
         # Knee symmetry
-        if features.get('knee_symmetry', 0) > 15:
-            issues.append("Uneven knee positioning")
-            recommendations.append("Focus on balanced movement")
-            score -= 10
-        
+        ('knee_symmetry', '>', 15, 0, 10,
+         "Uneven knee positioning", "Focus on balanced movement"),
         # Stance width
-        if features.get('foot_distance', 0) < 40:
-            issues.append("Stance too narrow")
-            recommendations.append("Widen stance to shoulder width")
-            score -= 10
-        
+        ('foot_distance', '<', 40, 0, 10,
+         "Stance too narrow", "Widen stance to shoulder width"),
         # Movement speed
-        knee_velocity = features.get('right_knee_angle_velocity', 0)
-        if knee_velocity > 100:
-            issues.append("Moving too quickly")
-            recommendations.append("Slow down for better control")
-            score -= 10
-    
-    elif exercise == "bicep_curl":
+        ('right_knee_angle_velocity', '>', 100, 0, 10,
+         "Moving too quickly", "Slow down for better control"),
+    ),
+    'bicep_curl': (
         # Elbow analysis
-        if features['right_elbow_angle'] > 170 or features['left_elbow_angle'] > 170:
-            issues.append("Elbow overextending")
-            recommendations.append("Don't fully lock out elbows")
-            score -= 10
-        
+        ('max_elbow_angle', '>', 170, np.nan, 10,
+         "Elbow overextending", "Don't fully lock out elbows"),
         # Momentum check
-        elbow_velocity = features.get('right_elbow_angle_velocity', 0)
-        if elbow_velocity > 150:
-            issues.append("Using momentum - swinging weights")
-            recommendations.append("Use controlled movements")
-            score -= 20
-        
+        ('right_elbow_angle_velocity', '>', 150, 0, 20,
+         "Using momentum - swinging weights", "Use controlled movements"),
         # Posture check
-        if features.get('torso_lean', 0) > 15:
-            issues.append("Leaning too much")
-            recommendations.append("Stand straight, engage core")
-            score -= 10
-    
-    elif exercise == "push_up":
+        ('torso_lean', '>', 15, 0, 10,
+         "Leaning too much", "Stand straight, engage core"),
+    ),
+    'push_up': (
         # Elbow angle
-        avg_elbow = (features['right_elbow_angle'] + features['left_elbow_angle']) / 2
-        if avg_elbow > 160:
-            issues.append("Not going down far enough")
-            recommendations.append("Lower until chest nearly touches ground")
-            score -= 15
-        
+        ('avg_elbow_angle', '>', 160, np.nan, 15,
+         "Not going down far enough", "Lower until chest nearly touches ground"),
         # Body alignment
-        if features.get('spine_angle', 180) < 160:
-            issues.append("Hips sagging or piking")
-            recommendations.append("Maintain straight line from head to heels")
-            score -= 20
+        ('spine_angle', '<', 160, 180, 20,
+         "Hips sagging or piking", "Maintain straight line from head to heels"),
+    ),
+}
+
+# Visibility check for all exercises
+COMMON_FORM_RULES = (
+    ('min_visibility', '<', 0.7, 1.0, 5,
+     "Poor camera angle or lighting", "Improve camera position and lighting"),
+)
+
+def _form_table(rules):
+    """Pack form rules into a condition table, integer penalties and message pairs"""
+    rules = tuple(rules) + COMMON_FORM_RULES
+    return (_condition_table([rule[:4] for rule in rules]),
+            np.array([rule[4] for rule in rules], dtype=np.int64),
+            tuple(rule[5:] for rule in rules))
+
+FORM_TABLES = {exercise: _form_table(rules) for exercise, rules in FORM_RULES.items()}
+COMMON_FORM_TABLE = _form_table(())
+
+def analyze_form_quality(exercise, features, coords):
+    """Enhanced form analysis with specific recommendations
     
-    # Visibility check for all exercises
-    if features.get('min_visibility', 1.0) < 0.7:
-        issues.append("Poor camera angle or lighting")
-        recommendations.append("Improve camera position and lighting")
-        score -= 5
+    Evaluates the exercise's form rules in one vectorized pass; each fired
+    rule deducts its penalty and contributes its issue and recommendation.
+    """
+    table, penalties, messages = FORM_TABLES.get(exercise, COMMON_FORM_TABLE)
+    fired = _evaluate_conditions(_rule_inputs(features), table)
+    fired_messages = [messages[index] for index in np.flatnonzero(fired)]
     
     return {
-        "overall_score": max(score, 0), 
-        "issues": issues,
-        "recommendations": recommendations
-    }
\ No newline at end of file
+        "overall_score": max(100 - int(penalties[fired].sum()), 0), 
+        "issues": [issue for issue, _ in fired_messages],
+        "recommendations": [recommendation for _, recommendation in fired_messages]
+    }
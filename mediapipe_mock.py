@@ -44,44 +44,75 @@ class MockPoseLandmark:
 
 class MockLandmark:
     """Mock landmark class"""
+    __slots__ = ('x', 'y', 'z', 'visibility')
+    
     def __init__(self, x: float, y: float, z: float = 0.0, visibility: float = 1.0):
         self.x = x
         self.y = y
         self.z = z
         self.visibility = visibility
 
+# Per-landmark mean and spread of x, y, z and visibility for realistic poses:
+# head landmarks, then upper body, then lower body
+_LANDMARK_MEAN = np.array([[0.5, 0.2, 0.0, 0.8]] * 11 +
+                          [[0.5, 0.4, 0.0, 0.8]] * 12 +
+                          [[0.5, 0.7, 0.0, 0.8]] * 10)
+_LANDMARK_STD = np.array([[0.05, 0.05, 0.0, 0.1]] * 11 +
+                         [[0.1, 0.1, 0.0, 0.1]] * 22)
+
+# Number of pregenerated poses MockPose cycles through
+POOL_SIZE = 64
+
+def _sample_landmarks(rng: np.random.Generator, count: Optional[int] = None) -> np.ndarray:
+    """Draw mock landmark rows of x, y, z and visibility in one call"""
+    size = _LANDMARK_MEAN.shape if count is None else (count,) + _LANDMARK_MEAN.shape
+    return _LANDMARK_MEAN + _LANDMARK_STD * rng.standard_normal(size)
+
+class MockLandmarkList:
+    """Read-only sequence of landmarks backed by a (33, 4) array"""
+    def __init__(self, array: np.ndarray):
+        self._array = array
+    
+    def __len__(self) -> int:
+        return len(self._array)
+    
+    def __getitem__(self, index: int) -> MockLandmark:
+        return MockLandmark(*self._array[index].tolist())
+    
+    def __iter__(self):
+        # Convert the whole array once rather than indexing row by row
+        for row in self._array.tolist():
+            yield MockLandmark(*row)
+
 class MockPoseLandmarks:
     """Mock pose landmarks container"""
-    def __init__(self):
-        # Create 33 mock landmarks with reasonable positions
-        self.landmark = []
-        for i in range(33):
-            # Generate realistic pose positions
-            if i < 11:  # Head landmarks
-                x = 0.5 + np.random.normal(0, 0.05)
-                y = 0.2 + np.random.normal(0, 0.05)
-            elif i < 23:  # Upper body
-                x = 0.5 + np.random.normal(0, 0.1)
-                y = 0.4 + np.random.normal(0, 0.1)
-            else:  # Lower body
-                x = 0.5 + np.random.normal(0, 0.1)
-                y = 0.7 + np.random.normal(0, 0.1)
-            
-            self.landmark.append(MockLandmark(x, y, visibility=0.8 + np.random.normal(0, 0.1)))
+    def __init__(self, array: Optional[np.ndarray] = None):
+        # Use the given landmark rows, or draw one set of reasonable positions
+        if array is None:
+            array = _sample_landmarks(np.random.default_rng())
+        self.landmark = MockLandmarkList(array)
 
 class MockPoseResults:
     """Mock pose detection results"""
-    def __init__(self):
-        self.pose_landmarks = MockPoseLandmarks()
+    def __init__(self, landmarks: Optional[np.ndarray] = None):
+        self.pose_landmarks = MockPoseLandmarks(landmarks)
 
 class MockPose:
-    """Mock MediaPipe Pose class"""
-    def __init__(self, **kwargs):
+    """Mock MediaPipe Pose class
+    
+    Pregenerates a pool of poses and cycles through it; pass seed=... for a
+    reproducible sequence.
+    """
+    def __init__(self, seed: Optional[int] = None, **kwargs):
         self.kwargs = kwargs
+        self._pool = _sample_landmarks(np.random.default_rng(seed), POOL_SIZE)
+        self._index = 0
     
     def process(self, image):
         """Mock pose processing"""
-        return MockPoseResults()
+        landmarks = self._pool[self._index % POOL_SIZE]
+        self._index += 1
+        return MockPoseResults(landmarks)
 
 class MockDrawing:
     """Mock drawing utilities"""
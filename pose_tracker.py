@@ -1,4 +1,5 @@
 import cv2
+import logging
 import mediapipe as mp
 import numpy as np
 import time
@@ -7,12 +8,19 @@ import csv
 from collections import deque
 import threading
 import queue
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import sys
 import traceback
 
+from utils.jit import njit, prange, NUMBA_AVAILABLE
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
 # Import your modules with error handling
 try:
-    from features import extract_comprehensive_features, detect_exercise_type, analyze_form_quality
+    from features import (extract_feature_vector, features_to_dict, detect_exercise_type,
+                          analyze_form_quality, DETECTED_EXERCISES, FEATURE_INDEX)
     print("[INFO] Successfully imported features module")
 except ImportError as e:
     print(f"[ERROR] Failed to import features module: {e}")
@@ -25,6 +33,135 @@ except ImportError as e:
     print(f"[ERROR] Failed to import SmartCoach: {e}")
     sys.exit(1)
 
+# Rep-counted exercises, indexing the rep state arrays
+REP_EXERCISES = ("squat", "bicep_curl", "push_up")
+REP_INDEX = {name: i for i, name in enumerate(REP_EXERCISES)}
+REP_SQUAT, REP_BICEP_CURL, REP_PUSH_UP = range(len(REP_EXERCISES))
+REP_THRESHOLD_LOW = (120, 90, 110)
+REP_THRESHOLD_HIGH = (160, 150, 160)
+# Feature-vector slots of the (right, left) joint angles each exercise counts on
+REP_ANGLE_SLOTS = np.array([
+    [FEATURE_INDEX['right_knee_angle'], FEATURE_INDEX['left_knee_angle']],
+    [FEATURE_INDEX['right_elbow_angle'], FEATURE_INDEX['left_elbow_angle']],
+    [FEATURE_INDEX['right_elbow_angle'], FEATURE_INDEX['left_elbow_angle']],
+])
+
+# Exercise ids for detection smoothing, with "unknown" as id 0
+SMOOTHED_EXERCISES = ("unknown",) + tuple(name for name in DETECTED_EXERCISES if name != "unknown")
+EXERCISE_ID = {name: i for i, name in enumerate(SMOOTHED_EXERCISES)}
+SMOOTHING_WINDOW = 10
+SMOOTHING_MIN_SAMPLES = 5
+
+# Controls footer
+CONTROLS_TEXT = "Q-Quit | S-Save | R-Reset | I-Info | L-Landmarks | C-Tip | W-Summary"
+
+# Rep phases: a rep starts extended (squat/push-up "up", curl "down"),
+# flexes below the low threshold and completes when extended past the high one
+PHASE_EXTENDED = 0
+PHASE_FLEXED = 1
+
+@njit(cache=True)
+def step_rep(phase, angle, lo, hi):
+    """Advance the rep state machine by one angle sample, returning (phase, rep delta)"""
+    if phase == PHASE_EXTENDED and angle < lo:
+        return PHASE_FLEXED, 0
+    if phase == PHASE_FLEXED and angle > hi:
+        return PHASE_EXTENDED, 1
+    return phase, 0
+
+@njit(parallel=True, cache=True)
+def flip_bgr2rgb_resize(src, dst):
+    """Mirror, convert BGR to RGB and downscale src into dst in one pass
+    
+    Each output pixel averages the 2x2 source block at its centre, which is
+    exactly INTER_AREA at a 2x downscale and close to it at other ratios.
+    """
+    h, w = src.shape[0], src.shape[1]
+    out_h, out_w = dst.shape[0], dst.shape[1]
+    for y in prange(out_h):
+        sy1 = min(((2 * y + 1) * h) // (2 * out_h), h - 1)
+        sy0 = max(sy1 - 1, 0)
+        for x in range(out_w):
+            sx1 = min(((2 * x + 1) * w) // (2 * out_w), w - 1)
+            sx0 = max(sx1 - 1, 0)
+            # Output column x reads mirrored source columns
+            mx0 = w - 1 - sx0
+            mx1 = w - 1 - sx1
+            for ch in range(3):
+                total = (np.int32(src[sy0, mx0, ch]) + src[sy0, mx1, ch]
+                         + src[sy1, mx0, ch] + src[sy1, mx1, ch])
+                dst[y, x, 2 - ch] = (total + 2) >> 2
+    return dst
+
+# Small blank frame that runs a pose graph's one-time start-up before real frames
+POSE_WARMUP_FRAME = np.zeros((64, 64, 3), np.uint8)
+
+def warm_up_pose(pose):
+    """Run the warm-up frame through a pose estimator and return it"""
+    pose.process(POSE_WARMUP_FRAME)
+    return pose
+
+# Compile the kernels at import rather than on the first frame
+if NUMBA_AVAILABLE:
+    step_rep(np.int32(0), 0.0, np.float32(0), np.float32(0))
+    flip_bgr2rgb_resize(np.zeros((2, 2, 3), np.uint8), np.empty((1, 1, 3), np.uint8))
+
+class _CaptureThread(threading.Thread):
+    """
+    Grabs camera frames continuously and decodes one only when the consumer
+    asks for it, so the consumer never sees frames that sat in a buffer
+    """
+    def __init__(self, cap, max_failures=10):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.max_failures = max_failures
+        self.lock = threading.Lock()
+        self.frame_ready = threading.Condition(self.lock)
+        self.stop_event = threading.Event()
+        self.failed = False
+        self._latest = None
+        self._wanted = False
+    
+    def run(self):
+        failures = 0
+        while not self.stop_event.is_set():
+            if not self.cap.grab():
+                failures += 1
+                if failures > self.max_failures:
+                    with self.lock:
+                        self.failed = True
+                        self.frame_ready.notify_all()
+                    break
+                time.sleep(0.01)
+                continue
+            failures = 0
+            
+            # Only decode the grabbed frame when someone is waiting for it
+            with self.lock:
+                if not self._wanted:
+                    continue
+            success, frame = self.cap.retrieve()
+            if success:
+                with self.lock:
+                    self._latest = frame
+                    self._wanted = False
+                    self.frame_ready.notify_all()
+    
+    def get_latest(self, timeout=1.0):
+        """Return the next freshly grabbed frame, or None on timeout or failure"""
+        with self.lock:
+            self._latest = None
+            self._wanted = True
+            self.frame_ready.wait_for(lambda: self._latest is not None or self.failed, timeout)
+            frame, self._latest = self._latest, None
+            return frame
+    
+    def stop(self):
+        """Stop grabbing and wait for the thread to exit"""
+        self.stop_event.set()
+        if self.is_alive():
+            self.join(timeout=2.0)
+
 class IntegratedPoseCoach:
     """
     Main class that integrates all components for seamless operation
@@ -36,16 +173,27 @@ class IntegratedPoseCoach:
         self.voice_enabled = voice_enabled
         self.camera_id = camera_id
         
-        # MediaPipe setup
+        # MediaPipe setup: the lite model tracks every frame and the full
+        # model runs alongside it on every keyframe_interval-th frame. The full
+        # model only sees keyframes, so it detects from scratch on each one
+        # instead of tracking across the gap
         try:
-            self.pose = mp.solutions.pose.Pose(
-                static_image_mode=False,
-                model_complexity=1,
-                enable_segmentation=False,
-                min_detection_confidence=0.7,
-                min_tracking_confidence=0.5
-            )
+            self.pose_lite = self._create_pose(model_complexity=0)
+            self.pose_full = self._create_pose(model_complexity=1, static_image_mode=True)
+            self.pose = self.pose_lite
+            self.keyframe_interval = 5
+            self.keyframe_pool = ThreadPoolExecutor(max_workers=1)
+            # Seconds a keyframe waits for the full model before falling back to lite
+            self.keyframe_timeout = 0.05
+            # Inference input (width, height); keeps the camera's 4:3 aspect since
+            # MediaPipe letterboxes internally and a squashed frame distorts the body
+            self.inference_size = (256, 192)
+            # Mean absolute thumbnail difference (0-255) below which a frame counts as still
+            self.motion_threshold = 1.0
             self.drawing = mp.solutions.drawing_utils
+            self._landmark_spec = self.drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
+            self._conn_spec = self.drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
+            self._pose_connections = mp.solutions.pose.POSE_CONNECTIONS
             print("[INFO] MediaPipe initialized successfully")
         except Exception as e:
             print(f"[ERROR] Failed to initialize MediaPipe: {e}")
@@ -61,22 +209,22 @@ class IntegratedPoseCoach:
             self.coach = None
         
         # Session tracking
-        self.session_start_time = time.time()
+        self.session_start_time = time.perf_counter()
         self.frame_count = 0
         self.fps_counter = deque(maxlen=30)
         
         # Exercise tracking
         self.current_exercise = "unknown"
         self.exercise_confidence = 0
-        self.exercise_history = deque(maxlen=10)  # For smoothing exercise detection
+        # Ring buffer of recent exercise ids for smoothing exercise detection
+        self.exercise_history = np.zeros(SMOOTHING_WINDOW, np.int8)
+        self.exercise_history_idx = 0
         
         # Rep counting
         self.rep_count = 0
-        self.rep_states = {
-            "squat": {"threshold_low": 120, "threshold_high": 160, "current_phase": "up", "last_angle": None},
-            "bicep_curl": {"threshold_low": 90, "threshold_high": 150, "current_phase": "down", "last_angle": None},
-            "push_up": {"threshold_low": 110, "threshold_high": 160, "current_phase": "up", "last_angle": None}
-        }
+        self.rep_phase = np.full(len(REP_EXERCISES), PHASE_EXTENDED, np.int32)
+        self.rep_threshold_low = np.array(REP_THRESHOLD_LOW, np.float32)
+        self.rep_threshold_high = np.array(REP_THRESHOLD_HIGH, np.float32)
         
         # Data logging
         self.data_file = "workout_session.csv"
@@ -86,11 +234,19 @@ class IntegratedPoseCoach:
         self.show_landmarks = True
         self.show_detailed_info = True
         self.recording_mode = False
+        self._panel_cache = None
+        self._panel_signature = None
+        self._panel_overflow = []
+        
+        # Coach calls run in order on a worker thread; commands are always queued,
+        # while per-frame updates are dropped once this many calls are waiting
+        self._coach_q = queue.Queue()
+        self.coach_update_backlog = 4
         
         # Performance tracking
         self.last_form_score = 100
         self.form_scores = deque(maxlen=50)
-        self.last_coaching_time = 0
+        self.last_coaching_time = float('-inf')
         self.coaching_interval = 8  # seconds
         
         # Error tracking
@@ -100,6 +256,17 @@ class IntegratedPoseCoach:
         print("[INFO] Integrated Pose Coach initialized successfully!")
         self.print_controls()
     
+    @staticmethod
+    def _create_pose(model_complexity, static_image_mode=False):
+        """Build a warmed-up pose estimator exposing process(rgb_frame) -> results"""
+        return warm_up_pose(mp.solutions.pose.Pose(
+            static_image_mode=static_image_mode,
+            model_complexity=model_complexity,
+            enable_segmentation=False,
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.5
+        ))
+    
     def print_controls(self):
         """Display available controls"""
         print("\n=== CONTROLS ===")
@@ -114,119 +281,115 @@ class IntegratedPoseCoach:
         print("===============\n")
     
     def ensure_data_file(self):
-        """Create CSV file for session data if it doesn't exist"""
+        """Open the session CSV for appending, writing the header if it is new"""
+        self._csv_fh = None
+        self._csv_writer = None
         try:
-            if not os.path.exists(self.data_file):
-                with open(self.data_file, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow([
-                        'timestamp', 'exercise', 'rep_count', 'form_score', 
-                        'issues', 'recommendations', 'session_duration'
-                    ])
+            is_new = not os.path.exists(self.data_file)
+            self._csv_fh = open(self.data_file, 'a', newline='', buffering=1 << 16)
+            self._csv_writer = csv.writer(self._csv_fh)
+            if is_new:
+                self._csv_writer.writerow([
+                    'timestamp', 'exercise', 'rep_count', 'form_score', 
+                    'issues', 'recommendations', 'session_duration'
+                ])
                 print(f"[INFO] Created data file: {self.data_file}")
         except Exception as e:
             print(f"[ERROR] Failed to create data file: {e}")
     
+    def close_data_file(self):
+        """Flush buffered session rows and close the CSV"""
+        if self._csv_fh is None:
+            return
+        try:
+            self._csv_fh.close()
+        except Exception as e:
+            print(f"[ERROR] Failed to close data file: {e}")
+        self._csv_fh = None
+        self._csv_writer = None
+    
     def smooth_exercise_detection(self, detected_exercise):
         """Smooth exercise detection to avoid rapid switching"""
-        if detected_exercise is None:
-            detected_exercise = "unknown"
-            
-        self.exercise_history.append(detected_exercise)
+        self.exercise_history[self.exercise_history_idx % SMOOTHING_WINDOW] = \
+            EXERCISE_ID.get(detected_exercise, 0)
+        self.exercise_history_idx += 1
         
-        if len(self.exercise_history) >= 5:
+        samples = min(self.exercise_history_idx, SMOOTHING_WINDOW)
+        if samples >= SMOOTHING_MIN_SAMPLES:
             # Count occurrences of each exercise in recent history
-            exercise_counts = {}
-            for ex in self.exercise_history:
-                exercise_counts[ex] = exercise_counts.get(ex, 0) + 1
-            
-            # Get most common exercise
-            most_common = max(exercise_counts, key=exercise_counts.get)
-            confidence = exercise_counts[most_common] / len(self.exercise_history)
+            counts = np.bincount(self.exercise_history[:samples], minlength=len(SMOOTHED_EXERCISES))
+            most_common = counts.argmax()
+            confidence = counts[most_common] / samples
             
             # Only update if confidence is high enough
             if confidence >= 0.6:  # 60% confidence threshold
-                self.current_exercise = most_common
-                self.exercise_confidence = confidence
+                self.current_exercise = SMOOTHED_EXERCISES[most_common]
+                self.exercise_confidence = float(confidence)
         
         return self.current_exercise
     
     def update_rep_count(self, features):
-        """Enhanced rep counting with proper state management"""
-        if self.current_exercise not in self.rep_states:
-            return
+        """Enhanced rep counting with proper state management
         
-        state = self.rep_states[self.current_exercise]
+        features is the vector from extract_feature_vector; a missing angle is
+        NaN, which fails every threshold comparison and leaves the phase as is.
+        """
+        exercise = REP_INDEX.get(self.current_exercise)
+        if exercise is None:
+            return
         
-        try:
-            if self.current_exercise == "squat":
-                if 'right_knee_angle' in features and 'left_knee_angle' in features:
-                    avg_knee = (features['right_knee_angle'] + features['left_knee_angle']) / 2
-                    self._count_reps_squat(avg_knee, state)
-            
-            elif self.current_exercise == "bicep_curl":
-                if 'right_elbow_angle' in features and 'left_elbow_angle' in features:
-                    avg_elbow = (features['right_elbow_angle'] + features['left_elbow_angle']) / 2
-                    self._count_reps_bicep(avg_elbow, state)
-            
-            elif self.current_exercise == "push_up":
-                if 'right_elbow_angle' in features and 'left_elbow_angle' in features:
-                    avg_elbow = (features['right_elbow_angle'] + features['left_elbow_angle']) / 2
-                    self._count_reps_pushup(avg_elbow, state)
+        right, left = features[REP_ANGLE_SLOTS[exercise]]
+        avg_angle = (right + left) / 2
         
-        except (KeyError, TypeError) as e:
-            print(f"[DEBUG] Rep counting error: {e}")
+        if exercise == REP_SQUAT:
+            self._count_reps_squat(avg_angle)
+        elif exercise == REP_BICEP_CURL:
+            self._count_reps_bicep(avg_angle)
+        elif exercise == REP_PUSH_UP:
+            self._count_reps_pushup(avg_angle)
     
-    def _count_reps_squat(self, knee_angle, state):
-        """Count squats based on knee angle"""
-        if state["current_phase"] == "up" and knee_angle < state["threshold_low"]:
-            state["current_phase"] = "down"
-            print(f"[DEBUG] Squat down phase - knee angle: {knee_angle:.1f}")
-        
-        elif state["current_phase"] == "down" and knee_angle > state["threshold_high"]:
-            state["current_phase"] = "up"
+    def _step_rep(self, exercise, angle):
+        """Advance one exercise's rep phase, returning True when a rep completes"""
+        phase, delta = step_rep(self.rep_phase[exercise], angle,
+                                self.rep_threshold_low[exercise],
+                                self.rep_threshold_high[exercise])
+        if phase != self.rep_phase[exercise]:
+            logger.debug("%s %s phase - angle: %.1f", REP_EXERCISES[exercise],
+                         "flexed" if phase == PHASE_FLEXED else "extended", angle)
+        self.rep_phase[exercise] = phase
+        if delta:
             self.rep_count += 1
+            return True
+        return False
+    
+    def _count_reps_squat(self, knee_angle):
+        """Count squats based on knee angle"""
+        if self._step_rep(REP_SQUAT, knee_angle):
             print(f"[INFO] Squat completed! Rep #{self.rep_count}")
-            if self.coach:
-                self.coach.say_coaching(f"Great squat! Rep {self.rep_count}")
+            self._coach_call('say_coaching', f"Great squat! Rep {self.rep_count}")
     
-    def _count_reps_bicep(self, elbow_angle, state):
+    def _count_reps_bicep(self, elbow_angle):
         """Count bicep curls based on elbow angle"""
-        if state["current_phase"] == "down" and elbow_angle < state["threshold_low"]:
-            state["current_phase"] = "up"
-            print(f"[DEBUG] Bicep curl up phase - elbow angle: {elbow_angle:.1f}")
-        
-        elif state["current_phase"] == "up" and elbow_angle > state["threshold_high"]:
-            state["current_phase"] = "down"
-            self.rep_count += 1
+        if self._step_rep(REP_BICEP_CURL, elbow_angle):
             print(f"[INFO] Bicep curl completed! Rep #{self.rep_count}")
-            if self.coach:
-                self.coach.say_coaching(f"Nice curl! Rep {self.rep_count}")
+            self._coach_call('say_coaching', f"Nice curl! Rep {self.rep_count}")
     
-    def _count_reps_pushup(self, elbow_angle, state):
+    def _count_reps_pushup(self, elbow_angle):
         """Count push-ups based on elbow angle"""
-        if state["current_phase"] == "up" and elbow_angle < state["threshold_low"]:
-            state["current_phase"] = "down"
-            print(f"[DEBUG] Push-up down phase - elbow angle: {elbow_angle:.1f}")
-        
-        elif state["current_phase"] == "down" and elbow_angle > state["threshold_high"]:
-            state["current_phase"] = "up"
-            self.rep_count += 1
+        if self._step_rep(REP_PUSH_UP, elbow_angle):
             print(f"[INFO] Push-up completed! Rep #{self.rep_count}")
-            if self.coach:
-                self.coach.say_coaching(f"Strong push-up! Rep {self.rep_count}")
+            self._coach_call('say_coaching', f"Strong push-up! Rep {self.rep_count}")
     
-    def calculate_fps(self):
-        """Calculate current FPS"""
-        current_time = time.time()
-        self.fps_counter.append(current_time)
+    def calculate_fps(self, now):
+        """Calculate current FPS from this frame's perf_counter() time"""
+        self.fps_counter.append(now)
         
         if len(self.fps_counter) > 1:
             fps = len(self.fps_counter) / (self.fps_counter[-1] - self.fps_counter[0])
             return fps
         return 0
     
-    def draw_interface(self, frame, features, analysis):
+    def draw_interface(self, frame, features, analysis, now):
         """Draw the main user interface"""
         h, w = frame.shape[:2]
         
@@ -245,37 +408,85 @@ class IntegratedPoseCoach:
             color = (0, 0, 255)  # Red
             level = "POOR"
         
-        # Main info panel
+        # Main info panel, re-rendered only when the values it shows change
         panel_height = 220 if self.show_detailed_info else 140
-        cv2.rectangle(frame, (10, 10), (420, panel_height), (0, 0, 0), -1)
-        cv2.rectangle(frame, (10, 10), (420, panel_height), color, 2)
+        panel = frame[10:panel_height + 1, 10:421]
+        detailed = self.show_detailed_info and analysis
+        signature = (
+            h, w, panel_height, self.current_exercise, self.rep_count, score,
+            f"{self.exercise_confidence:.1%}",
+            tuple(analysis.get('issues', [])[:2]) if detailed else None,
+            tuple(analysis.get('recommendations', [])[:2]) if detailed else None
+        )
+        if signature == self._panel_signature:
+            panel[...] = self._panel_cache
+            cv2.rectangle(frame, (10, 10), (420, panel_height), color, 2)
+        else:
+            frame[10:panel_height + 1, 10:421] = 0
+            cv2.rectangle(frame, (10, 10), (420, panel_height), color, 2)
+            
+            # Lines that spill past the border blend with the live image, so
+            # only the ones fully inside the panel are baked into the cache
+            self._panel_overflow = []
+            for line in self._panel_lines(analysis, score, color, level):
+                text, (x, y), scale, line_color, thickness = line
+                (text_w, _), baseline = cv2.getTextSize(
+                    text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+                if x + text_w + thickness < 419 and y + baseline + thickness < panel_height - 1:
+                    cv2.putText(frame, text, (x, y), 
+                               cv2.FONT_HERSHEY_SIMPLEX, scale, line_color, thickness)
+                else:
+                    self._panel_overflow.append(line)
+            self._panel_cache = panel.copy()
+            self._panel_signature = signature
+        
+        for text, org, scale, line_color, thickness in self._panel_overflow:
+            cv2.putText(frame, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, line_color, thickness)
+        
+        # Session info, drawn live over the cached panel
+        duration = now - self.session_start_time
+        fps = self.calculate_fps(now)
+        cv2.putText(frame, f"Time: {duration/60:.1f}m | FPS: {fps:.1f}", 
+                   (20, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        
+        # Recording indicator
+        if self.recording_mode:
+            cv2.circle(frame, (w - 30, 30), 8, (0, 0, 255), -1)
+            cv2.putText(frame, "REC", (w - 55, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+        
+        # Error indicator
+        if self.consecutive_errors > 3:
+            cv2.putText(frame, f"Errors: {self.consecutive_errors}", 
+                       (w - 120, h - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+        
+        # Controls
+        cv2.putText(frame, CONTROLS_TEXT, 
+                   (10, h - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (180, 180, 180), 1)
+    
+    def _panel_lines(self, analysis, score, color, level):
+        """Info panel text as (text, org, scale, color, thickness), minus the live session line"""
+        lines = []
         
         y = 35
         # Exercise info
-        cv2.putText(frame, f"Exercise: {self.current_exercise.replace('_', ' ').title()}", 
-                   (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        lines.append((f"Exercise: {self.current_exercise.replace('_', ' ').title()}", 
+                      (20, y), 0.7, (255, 255, 255), 2))
         y += 25
         
         # Rep count
-        cv2.putText(frame, f"Reps: {self.rep_count}", 
-                   (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        lines.append((f"Reps: {self.rep_count}", (20, y), 0.7, (0, 255, 255), 2))
         y += 25
         
         # Form score
-        cv2.putText(frame, f"Form: {int(score)}/100 ({level})", 
-                   (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        lines.append((f"Form: {int(score)}/100 ({level})", (20, y), 0.7, color, 2))
         y += 25
         
-        # Session info
-        duration = time.time() - self.session_start_time
-        fps = self.calculate_fps()
-        cv2.putText(frame, f"Time: {duration/60:.1f}m | FPS: {fps:.1f}", 
-                   (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        # Session info line is drawn live by draw_interface
         y += 20
         
         # Confidence indicator
-        cv2.putText(frame, f"Detection: {self.exercise_confidence:.1%}", 
-                   (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (150, 150, 150), 1)
+        lines.append((f"Detection: {self.exercise_confidence:.1%}", 
+                      (20, y), 0.5, (150, 150, 150), 1))
         y += 25
         
         # Detailed info
@@ -283,129 +494,232 @@ class IntegratedPoseCoach:
             # Issues
             issues = analysis.get('issues', [])
             if issues:
-                cv2.putText(frame, "Issues:", (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+                lines.append(("Issues:", (20, y), 0.6, (255, 255, 0), 2))
                 y += 20
                 for issue in issues[:2]:  # Show top 2 issues
                     text = f"• {issue[:35]}..." if len(issue) > 35 else f"• {issue}"
-                    cv2.putText(frame, text, (25, y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+                    lines.append((text, (25, y), 0.4, (255, 255, 255), 1))
                     y += 15
             
             # Recommendations
             recommendations = analysis.get('recommendations', [])
             if recommendations:
-                cv2.putText(frame, "Tips:", (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+                lines.append(("Tips:", (20, y), 0.6, (0, 255, 255), 2))
                 y += 20
                 for rec in recommendations[:2]:  # Show top 2 recommendations
                     text = f"• {rec[:35]}..." if len(rec) > 35 else f"• {rec}"
-                    cv2.putText(frame, text, (25, y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+                    lines.append((text, (25, y), 0.4, (255, 255, 255), 1))
                     y += 15
         
-        # Recording indicator
-        if self.recording_mode:
-            cv2.circle(frame, (w - 30, 30), 8, (0, 0, 255), -1)
-            cv2.putText(frame, "REC", (w - 55, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-        
-        # Error indicator
-        if self.consecutive_errors > 3:
-            cv2.putText(frame, f"Errors: {self.consecutive_errors}", 
-                       (w - 120, h - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-        
-        # Controls
-        cv2.putText(frame, "Q-Quit | S-Save | R-Reset | I-Info | L-Landmarks | C-Tip | W-Summary", 
-                   (10, h - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (180, 180, 180), 1)
+        return lines
     
     def save_session_data(self, analysis):
         """Save current session data to CSV"""
         try:
             timestamp = time.time()
-            duration = timestamp - self.session_start_time
+            duration = time.perf_counter() - self.session_start_time
             
-            with open(self.data_file, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    timestamp,
-                    self.current_exercise,
-                    self.rep_count,
-                    analysis.get('overall_score', 0) if analysis else 0,
-                    '; '.join(analysis.get('issues', [])) if analysis else '',
-                    '; '.join(analysis.get('recommendations', [])) if analysis else '',
-                    duration
-                ])
+            if self._csv_writer is None:
+                raise IOError(f"{self.data_file} is not open")
+            
+            self._csv_writer.writerow([
+                timestamp,
+                self.current_exercise,
+                self.rep_count,
+                analysis.get('overall_score', 0) if analysis else 0,
+                '; '.join(analysis.get('issues', [])) if analysis else '',
+                '; '.join(analysis.get('recommendations', [])) if analysis else '',
+                duration
+            ])
+            self._csv_fh.flush()
             
             print(f"[INFO] Session data saved to {self.data_file}")
-            if self.coach:
-                self.coach.say_coaching("Data saved!")
+            self._coach_call('say_coaching', "Data saved!")
             
         except Exception as e:
             print(f"[ERROR] Failed to save data: {e}")
     
     def reset_session(self):
         """Reset the current session"""
-        self.session_start_time = time.time()
+        self.session_start_time = time.perf_counter()
         self.rep_count = 0
         self.current_exercise = "unknown"
         self.exercise_confidence = 0
-        self.exercise_history.clear()
+        self.exercise_history.fill(0)
+        self.exercise_history_idx = 0
         self.form_scores.clear()
         self.fps_counter.clear()
         self.consecutive_errors = 0
         
         # Reset rep states
-        for exercise in self.rep_states:
-            self.rep_states[exercise]["current_phase"] = "up" if exercise in ["squat", "push_up"] else "down"
-            self.rep_states[exercise]["last_angle"] = None
+        self.rep_phase.fill(PHASE_EXTENDED)
         
         # Reset coach
-        if self.coach:
-            self.coach.reset_session()
+        self._coach_call('reset_session')
         
         print("[INFO] Session reset successfully")
     
     def update_coach(self, form_score, features, issues, recommendations):
         """Update the coach with current workout data"""
+        if not self.coach or self._coach_q.qsize() >= self.coach_update_backlog:
+            return
+        
+        # Use the enhanced update method if available
+        if hasattr(self.coach, 'update') and len(self.coach.update.__code__.co_varnames) > 3:
+            self._coach_call(
+                'update',
+                form_score=form_score,
+                rep_count=self.rep_count,
+                exercise_type=self.current_exercise,
+                features=features_to_dict(features),
+                issues=issues,
+                recommendations=recommendations
+            )
+        else:
+            # Fall back to basic update method
+            self._coach_call('update', form_score, self.rep_count)
+    
+    def _coach_call(self, method, *args, **kwargs):
+        """Queue a coach method call for the coaching thread"""
         if not self.coach:
             return
-            
+        self._coach_q.put((method, args, kwargs))
+    
+    def _coach_worker(self):
+        """Run queued coach calls off the render thread until a None sentinel arrives"""
+        while True:
+            item = self._coach_q.get()
+            if item is None:
+                break
+            method, args, kwargs = item
+            try:
+                getattr(self.coach, method)(*args, **kwargs)
+            except Exception as e:
+                print(f"[ERROR] Coach {method} failed: {e}")
+    
+    @staticmethod
+    def _put_latest(q, item):
+        """Put item on a size-1 queue, replacing and returning any item not yet consumed"""
+        dropped = None
+        while True:
+            try:
+                q.put_nowait(item)
+                return dropped
+            except queue.Full:
+                try:
+                    dropped = q.get_nowait()
+                except queue.Empty:
+                    pass
+    
+    def _inference_loop(self, capture, result_q, stop_event):
+        """Run pose inference on the newest camera frame and hand on (frame, results)
+        
+        Puts None when the camera stops delivering frames.
+        """
+        inference_index = 0
+        results = None
+        keyframe = None
+        # Persistent RGB inputs; a pending keyframe keeps reading its own buffer
+        rgb_buf = None
+        keyframe_buf = None
+        small = None
+        thumb = None
+        inferred_thumb = None
         try:
-            # Use the enhanced update method if available
-            if hasattr(self.coach, 'update') and len(self.coach.update.__code__.co_varnames) > 3:
-                self.coach.update(
-                    form_score=form_score,
-                    rep_count=self.rep_count,
-                    exercise_type=self.current_exercise,
-                    features=features,
-                    issues=issues,
-                    recommendations=recommendations
-                )
-            else:
-                # Fall back to basic update method
-                self.coach.update(form_score, self.rep_count)
+            while not stop_event.is_set():
+                camera_frame = capture.get_latest(timeout=0.5)
+                if camera_frame is None:
+                    if capture.failed:
+                        break
+                    continue
                 
-        except Exception as e:
-            print(f"[ERROR] Coach update failed: {e}")
+                # Process frame into a recycled display buffer
+                try:
+                    display_buf = self._frame_pool.get_nowait()
+                except queue.Empty:
+                    display_buf = None
+                frame = cv2.flip(camera_frame, 1, dst=display_buf)  # Mirror effect
+                
+                # Skip the model on a still scene: compare a 32x32 thumbnail with the
+                # one from the last inferred frame, so slow drift still triggers it.
+                # Otherwise every frame the capture thread hands over is inferred;
+                # taking only the latest frame already caps this at the model's speed
+                thumb = cv2.resize(frame, (32, 32), dst=thumb, interpolation=cv2.INTER_AREA)
+                run_inference = (results is None or inferred_thumb is None
+                                 or cv2.norm(thumb, inferred_thumb, cv2.NORM_L1)
+                                 >= self.motion_threshold * thumb.size)
+                if run_inference:
+                    thumb, inferred_thumb = inferred_thumb, thumb
+                
+                if run_inference:
+                    keyframe_due = ((keyframe is None or keyframe.done())
+                                    and inference_index % self.keyframe_interval == 0)
+                    inference_index += 1
+                    dst = keyframe_buf if keyframe_due else rgb_buf
+                    if dst is not None:
+                        dst.flags.writeable = True
+                    
+                    # Downscale and convert to RGB for MediaPipe; landmarks come back
+                    # normalized, so they still map onto the full-size frame
+                    if NUMBA_AVAILABLE:
+                        input_w, input_h = self.inference_size
+                        if dst is None or dst.shape[:2] != (input_h, input_w):
+                            dst = np.empty((input_h, input_w, 3), np.uint8)
+                        rgb_frame = flip_bgr2rgb_resize(camera_frame, dst)
+                    else:
+                        small = cv2.resize(frame, self.inference_size, dst=small,
+                                           interpolation=cv2.INTER_AREA)
+                        rgb_frame = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=dst)
+                    # Read-only input lets MediaPipe wrap the buffer instead of copying it
+                    rgb_frame.flags.writeable = False
+                    if keyframe_due:
+                        keyframe_buf = rgb_frame
+                    else:
+                        rgb_buf = rgb_frame
+                    try:
+                        # The full model reads the same frame in parallel with the lite one
+                        if keyframe_due:
+                            keyframe = self.keyframe_pool.submit(self.pose_full.process, rgb_frame)
+                        results = self.pose_lite.process(rgb_frame)
+                        
+                        # Wait briefly for the full model and prefer its result on the
+                        # frame it was computed for; one that misses the deadline is
+                        # stale by the time it finishes and is dropped
+                        if keyframe_due:
+                            try:
+                                keyframe_results = keyframe.result(timeout=self.keyframe_timeout)
+                            except FutureTimeoutError:
+                                keyframe_results = None
+                            if keyframe_results is not None and keyframe_results.pose_landmarks:
+                                results = keyframe_results
+                    except Exception as e:
+                        print(f"[ERROR] Pose inference failed: {e}")
+                        if keyframe is not None and keyframe.done():
+                            keyframe = None
+                        results = None
+                        self._frame_pool.put(frame)
+                        continue
+                
+                dropped = self._put_latest(result_q, (frame, results))
+                if dropped is not None:
+                    self._frame_pool.put(dropped[0])
+        finally:
+            self._put_latest(result_q, None)
     
-    def run(self):
-        """Main execution loop"""
-        # Initialize camera
-        cap = cv2.VideoCapture(self.camera_id)
-        
-        if not cap.isOpened():
-            print(f"[ERROR] Could not open camera {self.camera_id}")
-            return
-        
-        # Set camera properties
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        cap.set(cv2.CAP_PROP_FPS, 30)
-        
-        print("[INFO] Starting pose tracking...")
-        if self.coach:
-            self.coach.say_coaching("Pose tracking started! Let's get fit!")
+    def _analysis_loop(self, result_q, display_q, stop_event):
+        """Analyze pose results and hand (frame, landmarks, analysis, status) to the GUI
         
+        Runs commands queued by the GUI between frames, and puts None when the
+        camera stops delivering frames.
+        """
+        analysis = None
         try:
-            while True:
-                success, frame = cap.read()
-                if not success:
+            while not stop_event.is_set():
+                self._run_commands(analysis)
+                
+                try:
+                    item = result_q.get(timeout=1.0)
+                except queue.Empty:
                     print("[ERROR] Failed to capture frame")
                     self.consecutive_errors += 1
                     if self.consecutive_errors > self.max_consecutive_errors:
@@ -413,30 +727,31 @@ class IntegratedPoseCoach:
                         break
                     continue
                 
+                if item is None:
+                    if not stop_event.is_set():
+                        print("[ERROR] Camera stopped delivering frames, stopping")
+                    break
+                
                 # Reset error counter on successful frame
                 self.consecutive_errors = 0
                 
-                # Process frame
-                frame = cv2.flip(frame, 1)  # Mirror effect
+                frame, results = item
+                now = time.perf_counter()
                 h, w, _ = frame.shape
                 
-                # Convert to RGB for MediaPipe
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = self.pose.process(rgb_frame)
-                
                 # Initialize default values
-                features = None
-                coords = None
                 analysis = None
+                pose_landmarks = None
+                status = None
                 
                 if results.pose_landmarks:
                     landmarks = results.pose_landmarks.landmark
                     
                     try:
                         # Extract features
-                        features, coords = extract_comprehensive_features(landmarks, (h, w, 3))
+                        features, coords = extract_feature_vector(landmarks, (h, w, 3))
                         
-                        if features and coords:
+                        if features is not None:
                             # Detect and smooth exercise type
                             detected_exercise = detect_exercise_type(features, coords)
                             self.smooth_exercise_detection(detected_exercise)
@@ -448,59 +763,149 @@ class IntegratedPoseCoach:
                             self.update_rep_count(features)
                             
                             # Update coach
-                            current_time = time.time()
-                            if current_time - self.last_coaching_time > self.coaching_interval:
+                            if now - self.last_coaching_time > self.coaching_interval:
                                 self.update_coach(
                                     form_score=analysis.get('overall_score', 0),
                                     features=features,
                                     issues=analysis.get('issues', []),
                                     recommendations=analysis.get('recommendations', [])
                                 )
-                                self.last_coaching_time = current_time
+                                self.last_coaching_time = now
                             
                             # Track form scores
                             form_score = analysis.get('overall_score', 0)
                             self.form_scores.append(form_score)
                             self.last_form_score = form_score
                             
-                            # Draw landmarks
-                            if self.show_landmarks:
-                                self.drawing.draw_landmarks(
-                                    frame, 
-                                    results.pose_landmarks, 
-                                    mp.solutions.pose.POSE_CONNECTIONS,
-                                    mp.solutions.drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                                    mp.solutions.drawing_utils.DrawingSpec(color=(255, 0, 0), thickness=2)
-                                )
+                            pose_landmarks = results.pose_landmarks
                         
                         else:
-                            cv2.putText(frame, "Feature extraction failed", (50, 50), 
-                                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                            status = ("Feature extraction failed", 1)
                     
                     except Exception as e:
                         print(f"[ERROR] Processing error: {e}")
-                        cv2.putText(frame, f"Processing error: {str(e)[:30]}", (50, 50), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                        status = (f"Processing error: {str(e)[:30]}", 0.6)
                 
                 else:
-                    cv2.putText(frame, "No pose detected", (50, 50), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                    status = ("No pose detected", 1)
+                
+                dropped = self._put_latest(display_q, (frame, pose_landmarks, analysis, status))
+                if dropped is not None:
+                    self._frame_pool.put(dropped[0])
+        
+        except Exception as e:
+            print(f"[ERROR] Unexpected error: {e}")
+            traceback.print_exc()
+        
+        finally:
+            # Commands queued just before quitting (e.g. save then quit) still run
+            self._run_commands(analysis)
+            self._put_latest(display_q, None)
+    
+    def _run_commands(self, analysis):
+        """Apply the commands the GUI queued since the last frame"""
+        while True:
+            try:
+                command = self._command_q.get_nowait()
+            except queue.Empty:
+                return
+            if command == 'save' and analysis:
+                self.save_session_data(analysis)
+            elif command == 'reset':
+                self.reset_session()
+    
+    def run(self):
+        """Main execution loop
+        
+        The calling thread only draws, shows frames and polls keys; capture,
+        inference and analysis each run on their own thread.
+        """
+        # Initialize camera
+        cap = cv2.VideoCapture(self.camera_id)
+        
+        if not cap.isOpened():
+            print(f"[ERROR] Could not open camera {self.camera_id}")
+            return
+        
+        # Set camera properties
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        cap.set(cv2.CAP_PROP_FPS, 30)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
+        # Grab frames on a dedicated thread so inference always gets the newest one
+        capture = _CaptureThread(cap)
+        capture.start()
+        
+        # Run pose inference on its own thread, overlapping with analysis and display.
+        # Display frames cycle between the threads through a free-list instead of
+        # being reallocated every frame
+        self._frame_pool = queue.SimpleQueue()
+        result_q = queue.Queue(maxsize=1)
+        stop_event = threading.Event()
+        inference = threading.Thread(target=self._inference_loop,
+                                     args=(capture, result_q, stop_event), daemon=True)
+        inference.start()
+        
+        # Analyze on another thread, taking key commands from the GUI through a queue
+        self._command_q = queue.SimpleQueue()
+        display_q = queue.Queue(maxsize=1)
+        analyzer = threading.Thread(target=self._analysis_loop,
+                                    args=(result_q, display_q, stop_event), daemon=True)
+        analyzer.start()
+        
+        coaching = threading.Thread(target=self._coach_worker, daemon=True)
+        coaching.start()
+        
+        print("[INFO] Starting pose tracking...")
+        self._coach_call('say_coaching', "Pose tracking started! Let's get fit!")
+        
+        try:
+            while True:
+                try:
+                    item = display_q.get(timeout=0.01)
+                except queue.Empty:
+                    item = ()
                 
-                # Draw interface (always draw, even without data)
-                self.draw_interface(frame, features, analysis)
+                if item is None:
+                    break
                 
-                # Display frame
-                cv2.imshow("Integrated Pose Coach", frame)
+                if item:
+                    frame, pose_landmarks, analysis, status = item
+                    now = time.perf_counter()
+                    
+                    if status:
+                        text, scale = status
+                        cv2.putText(frame, text, (50, 50), 
+                                   cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 255), 2)
+                    
+                    # Draw landmarks
+                    if pose_landmarks and self.show_landmarks:
+                        self.drawing.draw_landmarks(
+                            frame, 
+                            pose_landmarks, 
+                            self._pose_connections,
+                            self._landmark_spec,
+                            self._conn_spec
+                        )
+                    
+                    # Draw interface (always draw, even without data)
+                    self.draw_interface(frame, None, analysis, now)
+                    
+                    # Display frame; imshow copies it, so the buffer can be reused
+                    cv2.imshow("Integrated Pose Coach", frame)
+                    self._frame_pool.put(frame)
+                    self.frame_count += 1
                 
-                # Handle key presses
+                # Handle key presses; save and reset run on the analysis thread
                 key = cv2.waitKey(1) & 0xFF
                 
                 if key == ord('q'):
                     break
-                elif key == ord('s') and analysis:
-                    self.save_session_data(analysis)
+                elif key == ord('s'):
+                    self._command_q.put('save')
                 elif key == ord('r'):
-                    self.reset_session()
+                    self._command_q.put('reset')
                 elif key == ord('i'):
                     self.show_detailed_info = not self.show_detailed_info
                     print(f"[INFO] Detailed info: {'ON' if self.show_detailed_info else 'OFF'}")
@@ -508,17 +913,13 @@ class IntegratedPoseCoach:
                     self.show_landmarks = not self.show_landmarks
                     print(f"[INFO] Landmarks: {'ON' if self.show_landmarks else 'OFF'}")
                 elif key == ord('c'):
-                    if self.coach:
-                        self.coach.give_specific_tip(self.current_exercise)
+                    self._coach_call('give_specific_tip', self.current_exercise)
                 elif key == ord('w'):
-                    if self.coach:
-                        self.coach.give_workout_summary()
+                    self._coach_call('give_workout_summary')
                 elif key == ord(' '):
                     self.recording_mode = not self.recording_mode
                     print(f"[INFO] Recording mode: {'ON' if self.recording_mode else 'OFF'}")
                 
-                self.frame_count += 1
-                
         except KeyboardInterrupt:
             print("\n[INFO] Interrupted by user")
         
@@ -528,8 +929,19 @@ class IntegratedPoseCoach:
         
         finally:
             # Cleanup
+            stop_event.set()
+            analyzer.join(timeout=2.0)
+            inference.join(timeout=2.0)
+            self.keyframe_pool.shutdown(wait=False)
+            # Never wait on the coach at exit: the sentinel put cannot block on the
+            # unbounded queue, and a worker stuck in a slow call is left to die
+            # with its daemon thread once the join times out
+            self._coach_q.put_nowait(None)
+            coaching.join(timeout=2.0)
+            capture.stop()
             cap.release()
             cv2.destroyAllWindows()
+            self.close_data_file()
             
             # Final workout summary
             if self.coach and len(self.form_scores) > 0:
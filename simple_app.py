@@ -4,23 +4,48 @@ Simple version of AI Fitness Coach for testing
 This version works without MediaPipe and other complex dependencies
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request
+import gzip
+import hashlib
 import os
 import json
+import sys
+import threading
+import time
 import uuid
-from datetime import datetime
+
+from utils.serialization import dumps, json_response
+
+# Import brotli with fallback to gzip-only compression
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'test-secret-key'
+# Match with or without a trailing slash instead of redirecting
+app.url_map.strict_slashes = False
 
-# Ensure directories exist
-os.makedirs('uploads', exist_ok=True)
-os.makedirs('static/results', exist_ok=True)
+# Storage directories, created once on first use rather than at every import
+STORAGE_DIRS = ('uploads', 'static/results')
+_storage_ready = False
+_storage_lock = threading.Lock()
 
-@app.route('/')
-def index():
-    """Main page"""
-    return """
+def _ensure_storage_dirs():
+    """Create the upload and result folders the first time a handler needs them"""
+    global _storage_ready
+    if _storage_ready:
+        return
+    with _storage_lock:
+        if not _storage_ready:
+            for directory in STORAGE_DIRS:
+                os.makedirs(directory, exist_ok=True)
+            _storage_ready = True
+
+# Landing page markup, encoded once at import instead of on every request
+INDEX_HTML = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -255,46 +280,140 @@ def index():
     </html>
     """
 
+def _minify_html(html: str) -> str:
+    """Strip indentation, blank lines and whole-line JS comments"""
+    # Line breaks stay so the inline script never relies on joined-line ASI
+    lines = (line.strip() for line in html.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+_INDEX_BODY = _minify_html(INDEX_HTML).encode('utf-8')
+
+# Precompressed variants in order of preference, compressed once at import
+_INDEX_ENCODED = {}
+if BROTLI_AVAILABLE:
+    _INDEX_ENCODED['br'] = brotli.compress(_INDEX_BODY, quality=11)
+_INDEX_ENCODED['gzip'] = gzip.compress(_INDEX_BODY, compresslevel=9, mtime=0)
+
+# Strong ETag per representation so conditional reloads get a bodyless 304
+_INDEX_ETAGS = {encoding: hashlib.blake2b(body, digest_size=16).hexdigest()
+                for encoding, body in [(None, _INDEX_BODY), *_INDEX_ENCODED.items()]}
+INDEX_MAX_AGE = 300
+
+@app.route('/', methods=['GET'])
+def index():
+    """Main page"""
+    encoding = request.accept_encodings.best_match(list(_INDEX_ENCODED))
+    response = app.response_class(_INDEX_ENCODED.get(encoding, _INDEX_BODY),
+                                  mimetype='text/html')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(_INDEX_ETAGS[encoding])
+    response.cache_control.public = True
+    response.cache_control.max_age = INDEX_MAX_AGE
+    return response.make_conditional(request)
+
+# Constant response bodies, encoded once; templates get values spliced per request
+_SESSION_ID_PLACEHOLDER = b'__SID__'
+_TIMESTAMP_PLACEHOLDER = b'__TS__'
+
+_UPLOAD_BODY = dumps({
+    'success': True,
+    'message': 'Video uploaded successfully (demo mode)',
+    'filename': 'demo_video.mp4'
+})
+
+_ANALYZE_TEMPLATE = dumps({
+    'success': True,
+    'session_id': _SESSION_ID_PLACEHOLDER.decode('ascii'),
+    'results': {
+        'exercise_detected': 'squat',
+        'confidence': 0.95,
+        'overall_score': 85,
+        'rep_count': 12,
+        'issues_detected': ['knee_angle too shallow', 'hip_hinge could be deeper'],
+        'recommendations': ['Go deeper in your squat', 'Keep your chest up', 'Push through your heels'],
+        'frames_analyzed': 1500,
+        'video_duration': 45.2,
+        'fps': 30
+    }
+})
+
+_HEALTH_TEMPLATE = dumps({
+    'status': 'healthy',
+    'timestamp': _TIMESTAMP_PLACEHOLDER.decode('ascii'),
+    'version': '1.0.0-demo',
+    'mode': 'demo'
+})
+
 @app.route('/api/upload', methods=['POST'])
 def upload_video():
     """Handle video upload (mock)"""
-    return jsonify({
-        'success': True,
-        'message': 'Video uploaded successfully (demo mode)',
-        'filename': 'demo_video.mp4'
-    })
+    _ensure_storage_dirs()
+    return json_response(_UPLOAD_BODY)
+
+# Session ids are sliced from a pooled os.urandom buffer, refilled in one read
+_SESSION_ID_BYTES = 16
+_SESSION_ID_POOL_SIZE = 4096
+_session_id_pool = b''
+_session_id_offset = 0
+_session_id_lock = threading.Lock()
+
+def _new_session_id() -> bytes:
+    """Return a random version-4 UUID string session id, as uuid4() would, from the pool"""
+    global _session_id_pool, _session_id_offset
+    with _session_id_lock:
+        if _session_id_offset >= len(_session_id_pool):
+            _session_id_pool = os.urandom(_SESSION_ID_BYTES * _SESSION_ID_POOL_SIZE)
+            _session_id_offset = 0
+        start = _session_id_offset
+        _session_id_offset = start + _SESSION_ID_BYTES
+        # Slice under the lock so a concurrent refill cannot hand out these bytes again
+        session_bytes = _session_id_pool[start:start + _SESSION_ID_BYTES]
+    return str(uuid.UUID(bytes=session_bytes, version=4)).encode('ascii')
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze_video():
     """Handle video analysis (mock)"""
-    return jsonify({
-        'success': True,
-        'session_id': str(uuid.uuid4()),
-        'results': {
-            'exercise_detected': 'squat',
-            'confidence': 0.95,
-            'overall_score': 85,
-            'rep_count': 12,
-            'issues_detected': ['knee_angle too shallow', 'hip_hinge could be deeper'],
-            'recommendations': ['Go deeper in your squat', 'Keep your chest up', 'Push through your heels'],
-            'frames_analyzed': 1500,
-            'video_duration': 45.2,
-            'fps': 30
-        }
-    })
+    _ensure_storage_dirs()
+    return json_response(_ANALYZE_TEMPLATE.replace(_SESSION_ID_PLACEHOLDER, _new_session_id()))
 
-@app.route('/health')
+# Health body reused across probes within this many seconds
+HEALTH_CACHE_TTL = 0.5
+_health_cache = (float('-inf'), b'')  # (monotonic build time, body)
+
+@app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0-demo',
-        'mode': 'demo'
-    })
+    global _health_cache
+    built_at, body = _health_cache
+    now = time.monotonic()
+    if now - built_at > HEALTH_CACHE_TTL:
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()).encode('ascii')
+        body = _HEALTH_TEMPLATE.replace(_TIMESTAMP_PLACEHOLDER, timestamp)
+        _health_cache = (now, body)
+    return json_response(body)
+
+def _serve():
+    """Serve under gunicorn, falling back to Flask's threaded server without it"""
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError:
+        print("⚠️  gunicorn not installed - using Flask's threaded server")
+        app.run(host='0.0.0.0', port=5000, threaded=True)
+        return
+    sys.argv = ['gunicorn', '--bind', '0.0.0.0:5000',
+                '--chdir', os.path.dirname(os.path.abspath(__file__)),
+                '--workers', str(os.cpu_count() or 1),
+                '--worker-class', 'gthread', '--threads', '4',
+                'simple_app:app']
+    run()
 
 if __name__ == '__main__':
     print("🚀 Starting AI Fitness Coach Demo...")
     print("📱 Open your browser and go to: http://localhost:5000")
     print("💡 This is a demo version - no actual video processing")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    if '--debug' in sys.argv:
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    else:
+        _serve()
@@ -2,29 +2,177 @@ import time
 import random
 import numpy as np
 from collections import deque
+from functools import lru_cache
 import threading
-import queue
-try:
-    import pyttsx3
-    VOICE_AVAILABLE = True
-except ImportError:
-    VOICE_AVAILABLE = False
-    print("[WARNING] pyttsx3 not available. Voice coaching disabled.")
+
+@lru_cache(maxsize=1)
+def load_pyttsx3():
+    """Import pyttsx3 on first use, returning None when it is unavailable
+    
+    Deferred so coaches without voice never pay for the TTS backend import.
+    """
+    try:
+        import pyttsx3
+    except ImportError:
+        print("[WARNING] pyttsx3 not available. Voice coaching disabled.")
+        return None
+    return pyttsx3
+
+# Ring buffer capacities for coach history
+FORM_HISTORY_SIZE = 100  # Last 100 form scores
+REP_HISTORY_SIZE = 50    # Last 50 rep timestamps
+
+# Seconds during which an identical coaching message is not repeated
+REPEAT_MESSAGE_WINDOW = 15
+
+# Score change below which an issue-free update counts as steady state
+STEADY_SCORE_DELTA = 3
+
+# Exercise-independent coaching lines
+IMPROVEMENT_MESSAGES = (
+    "Good effort! Let's fine-tune that form.",
+    "You're on the right track. Small adjustments needed.",
+    "Almost there! Focus on the details."
+)
+GENERAL_ENCOURAGEMENTS = (
+    "Excellent form! Keep it up!",
+    "You're crushing it!",
+    "Perfect technique!",
+    "That's how it's done!",
+    "Strong work!"
+)
+# End-of-workout advice by performance level
+SUMMARY_ADVICE = {
+    "excellent": "Outstanding work! You're ready for more challenging variations.",
+    "good": "Solid session! Focus on consistency for continued improvement.",
+    "needs improvement": "Good effort! Practice with lighter weights or fewer reps to master the form.",
+    "poor": "Remember, quality over quantity. Focus on perfect form first."
+}
+GENERAL_TIPS = (
+    "Focus on controlled movements",
+    "Quality over quantity always",
+    "Breathe properly during each rep",
+    "Engage your core throughout",
+    "Listen to your body"
+)
+
+def ring_window_stats(ring, head, count):
+    """Mean and least-squares slope of the last count ring entries, oldest first
+    
+    The slope is the closed-form degree-1 fit against indices 0..count-1.
+    """
+    window = ring.take(np.arange(head - count, head), mode='wrap')
+    offsets = np.arange(count) - (count - 1) / 2
+    return float(window.mean()), float(offsets @ window) / float(offsets @ offsets)
 
 class EnhancedSmartCoach:
+    # Fixed attribute layout; read-only coaching knowledge is shared at class level
+    __slots__ = (
+        'voice_enabled', 'voice_engine', 'voice_thread',
+        'session_start_time', 'exercise_history', 'last_rep_count', '_last_form_score',
+        '_form_scores', '_form_head', '_form_n', '_form_sum',
+        '_rep_times', '_rep_head', '_rep_n', '_rep_window_n', '_exercise_counts',
+        'current_exercise', 'coaching_mode', 'last_coaching_time', 'coaching_interval',
+        'fatigue_detected', 'rest_recommended', 'rest_start_time', 'recommended_rest_duration',
+        '_voice_messages', '_voice_cv', '_voice_stop', '_last_message', '_last_message_time'
+    )
+    
+    # Exercise-specific coaching knowledge
+    exercise_tips = {
+        "squat": {
+            "form_tips": (
+                "Keep your chest up and core engaged",
+                "Push through your heels",
+                "Don't let knees cave inward",
+                "Sit back like you're sitting in a chair",
+                "Keep your weight centered"
+            ),
+            "common_issues": {
+                "knee_angle": "Focus on proper depth - thighs parallel to ground",
+                "torso_lean": "Keep chest up, don't lean forward",
+                "knee_symmetry": "Keep knees aligned with toes",
+                "foot_distance": "Adjust stance to shoulder width"
+            },
+            "encouragement": (
+                "Strong squats! Keep it up!",
+                "Great depth on that one!",
+                "Perfect form - you're crushing it!",
+                "Feel those glutes working!"
+            )
+        },
+        "bicep_curl": {
+            "form_tips": (
+                "Keep elbows at your sides",
+                "Control the negative portion",
+                "Don't swing the weights",
+                "Focus on the bicep contraction",
+                "Keep your core tight"
+            ),
+            "common_issues": {
+                "elbow_angle": "Control the range of motion",
+                "torso_lean": "Stand straight, no leaning",
+                "velocity": "Slow down - control the weight"
+            },
+            "encouragement": (
+                "Nice controlled movement!",
+                "Feel that bicep burn!",
+                "Excellent form on those curls!",
+                "Keep that control!"
+            )
+        },
+        "push_up": {
+            "form_tips": (
+                "Keep body in straight line",
+                "Lower chest to ground",
+                "Push through your palms",
+                "Keep core engaged",
+                "Don't let hips sag"
+            ),
+            "common_issues": {
+                "spine_angle": "Keep that plank position strong",
+                "elbow_angle": "Go deeper - chest to ground",
+                "symmetry": "Keep body aligned"
+            },
+            "encouragement": (
+                "Strong push-ups!",
+                "Perfect plank position!",
+                "You're getting stronger!",
+                "Great upper body work!"
+            )
+        }
+    }
+    
+    # Performance thresholds
+    performance_thresholds = {
+        "excellent": 90,
+        "good": 75,
+        "needs_improvement": 60,
+        "poor": 40
+    }
+    
     def __init__(self, voice_enabled=True):
-        self.voice_enabled = voice_enabled and VOICE_AVAILABLE
+        pyttsx3 = load_pyttsx3() if voice_enabled else None
+        self.voice_enabled = pyttsx3 is not None
         
         # Performance tracking
-        self.session_start_time = time.time()
-        self.form_history = deque(maxlen=100)  # Last 100 form scores
-        self.rep_history = deque(maxlen=50)    # Last 50 reps with timestamps
+        self.session_start_time = time.monotonic()
+        # Form scores and rep timestamps live in preallocated ring buffers
+        self._form_scores = np.zeros(FORM_HISTORY_SIZE, dtype=np.float64)
+        self._form_head = 0
+        self._form_n = 0
+        self._form_sum = 0.0
+        self._rep_times = np.zeros(REP_HISTORY_SIZE, dtype=np.float64)
+        self._rep_head = 0
+        self._rep_n = 0
+        self._rep_window_n = 0  # Newest reps still inside the 60 s rate window
         self.exercise_history = deque(maxlen=20)  # Exercise type history
+        self._exercise_counts = {}  # Running histogram of exercise_history
+        self._last_form_score = 100
         
         # Coaching state
         self.current_exercise = "unknown"
         self.coaching_mode = "encouragement"  # encouragement, correction, rest
-        self.last_coaching_time = 0
+        self.last_coaching_time = float('-inf')
         self.coaching_interval = 5  # Minimum seconds between coaching
         
         # Fatigue and rest management
@@ -38,85 +186,16 @@ class EnhancedSmartCoach:
             self.voice_engine = pyttsx3.init()
             self.setup_voice()
             
-        # Message queue for non-blocking voice
-        self.voice_queue = queue.Queue()
+        # Bounded message buffer for non-blocking voice; the oldest message drops when full
+        self._voice_messages = deque(maxlen=8)
+        self._voice_cv = threading.Condition()
+        self._voice_stop = False
         self.voice_thread = None
+        self._last_message = None
+        self._last_message_time = float('-inf')
         if self.voice_enabled:
             self.start_voice_thread()
         
-        # Exercise-specific coaching knowledge
-        self.exercise_tips = {
-            "squat": {
-                "form_tips": [
-                    "Keep your chest up and core engaged",
-                    "Push through your heels",
-                    "Don't let knees cave inward",
-                    "Sit back like you're sitting in a chair",
-                    "Keep your weight centered"
-                ],
-                "common_issues": {
-                    "knee_angle": "Focus on proper depth - thighs parallel to ground",
-                    "torso_lean": "Keep chest up, don't lean forward",
-                    "knee_symmetry": "Keep knees aligned with toes",
-                    "foot_distance": "Adjust stance to shoulder width"
-                },
-                "encouragement": [
-                    "Strong squats! Keep it up!",
-                    "Great depth on that one!",
-                    "Perfect form - you're crushing it!",
-                    "Feel those glutes working!"
-                ]
-            },
-            "bicep_curl": {
-                "form_tips": [
-                    "Keep elbows at your sides",
-                    "Control the negative portion",
-                    "Don't swing the weights",
-                    "Focus on the bicep contraction",
-                    "Keep your core tight"
-                ],
-                "common_issues": {
-                    "elbow_angle": "Control the range of motion",
-                    "torso_lean": "Stand straight, no leaning",
-                    "velocity": "Slow down - control the weight"
-                },
-                "encouragement": [
-                    "Nice controlled movement!",
-                    "Feel that bicep burn!",
-                    "Excellent form on those curls!",
-                    "Keep that control!"
-                ]
-            },
-            "push_up": {
-                "form_tips": [
-                    "Keep body in straight line",
-                    "Lower chest to ground",
-                    "Push through your palms",
-                    "Keep core engaged",
-                    "Don't let hips sag"
-                ],
-                "common_issues": {
-                    "spine_angle": "Keep that plank position strong",
-                    "elbow_angle": "Go deeper - chest to ground",
-                    "symmetry": "Keep body aligned"
-                },
-                "encouragement": [
-                    "Strong push-ups!",
-                    "Perfect plank position!",
-                    "You're getting stronger!",
-                    "Great upper body work!"
-                ]
-            }
-        }
-        
-        # Performance thresholds
-        self.performance_thresholds = {
-            "excellent": 90,
-            "good": 75,
-            "needs_improvement": 60,
-            "poor": 40
-        }
-        
         print("[INFO] Enhanced Smart Coach initialized")
     
     def setup_voice(self):
@@ -143,52 +222,104 @@ class EnhancedSmartCoach:
             
         def voice_worker():
             while True:
-                try:
-                    message = self.voice_queue.get(timeout=1)
-                    if message == "STOP":
+                # Sleep until a message or stop arrives; pending messages are spoken before stopping
+                with self._voice_cv:
+                    while not self._voice_messages and not self._voice_stop:
+                        self._voice_cv.wait()
+                    if not self._voice_messages:
                         break
+                    message = self._voice_messages.popleft()
+                try:
                     self.voice_engine.say(message)
                     self.voice_engine.runAndWait()
-                except queue.Empty:
-                    continue
                 except Exception as e:
                     print(f"[ERROR] Voice system error: {e}")
         
         self.voice_thread = threading.Thread(target=voice_worker, daemon=True)
         self.voice_thread.start()
     
-    def update(self, form_score, rep_count, exercise_type="unknown", features=None, issues=None, recommendations=None):
-        """Main update method called from pose tracker"""
-        current_time = time.time()
+    def update(self, form_score, rep_count, exercise_type=None, features=None, issues=None, recommendations=None):
+        """Main update method called from pose tracker; exercise_type None keeps the current exercise"""
+        if exercise_type is None:
+            exercise_type = self.current_exercise
+        
+        # One monotonic timestamp per update, shared by the helpers below
+        current_time = time.monotonic()
+        
+        # Steady state: same exercise, no issues, no rest pending and a near-unchanged score
+        steady = (self._form_n and not issues and not self.rest_recommended
+                  and exercise_type == self.current_exercise
+                  and abs(form_score - self._last_form_score) < STEADY_SCORE_DELTA)
+        self._last_form_score = form_score
         
         # Update tracking data
-        self.form_history.append((current_time, form_score))
+        self._push_form(form_score)
         self.current_exercise = exercise_type
-        self.exercise_history.append(exercise_type)
+        self._push_exercise(exercise_type)
         
         # Track reps
-        if hasattr(self, 'last_rep_count'):
-            if rep_count > self.last_rep_count:
-                self.rep_history.append(current_time)
+        new_rep = hasattr(self, 'last_rep_count') and rep_count > self.last_rep_count
+        if new_rep:
+            self._push_rep(current_time)
         self.last_rep_count = rep_count
         
-        # Analyze performance and provide coaching
-        self.analyze_performance(form_score, rep_count, features, issues, recommendations)
+        # Analyze performance, skipping the rep-rate window while nothing has moved
+        self.analyze_performance(current_time, form_score, rep_count, features, issues, recommendations,
+                                 check_rep_rate=not steady or new_rep)
         
         # Check if coaching is needed
         if current_time - self.last_coaching_time > self.coaching_interval:
-            self.provide_coaching(form_score, rep_count, issues, recommendations)
+            self.provide_coaching(current_time, form_score, rep_count, issues, recommendations)
             self.last_coaching_time = current_time
     
-    def analyze_performance(self, form_score, rep_count, features, issues, recommendations):
+    def _push_form(self, form_score):
+        """Append a score to the ring, retiring the evicted score from the running sum"""
+        head = self._form_head
+        if self._form_n == FORM_HISTORY_SIZE:
+            self._form_sum -= self._form_scores[head]
+        else:
+            self._form_n += 1
+        self._form_scores[head] = form_score
+        self._form_sum += form_score
+        self._form_head = (head + 1) % FORM_HISTORY_SIZE
+    
+    def _push_rep(self, timestamp):
+        """Record a rep timestamp, overwriting the oldest once the ring is full"""
+        self._rep_times[self._rep_head] = timestamp
+        self._rep_head = (self._rep_head + 1) % REP_HISTORY_SIZE
+        self._rep_n = min(self._rep_n + 1, REP_HISTORY_SIZE)
+        self._rep_window_n = min(self._rep_window_n + 1, REP_HISTORY_SIZE)
+    
+    def _reps_last_minute(self, current_time):
+        """Count reps in the last 60 s, retiring expired ones from the window's old end"""
+        window_n = self._rep_window_n
+        while window_n:
+            oldest = (self._rep_head - window_n) % REP_HISTORY_SIZE
+            if current_time - self._rep_times[oldest] < 60:
+                break
+            window_n -= 1
+        self._rep_window_n = window_n
+        return window_n
+    
+    def _push_exercise(self, exercise_type):
+        """Append to exercise_history, keeping the histogram in step with evictions"""
+        history = self.exercise_history
+        counts = self._exercise_counts
+        if len(history) == history.maxlen:
+            evicted = history[0]
+            counts[evicted] -= 1
+            if not counts[evicted]:
+                del counts[evicted]
+        history.append(exercise_type)
+        counts[exercise_type] = counts.get(exercise_type, 0) + 1
+    
+    def analyze_performance(self, current_time, form_score, rep_count, features, issues, recommendations,
+                            check_rep_rate=True):
         """Analyze current performance and detect patterns"""
-        current_time = time.time()
         
         # Analyze form trend
-        if len(self.form_history) >= 10:
-            recent_scores = [score for _, score in list(self.form_history)[-10:]]
-            avg_recent_form = np.mean(recent_scores)
-            form_trend = np.polyfit(range(len(recent_scores)), recent_scores, 1)[0]
+        if self._form_n >= 10:
+            avg_recent_form, form_trend = ring_window_stats(self._form_scores, self._form_head, 10)
             
             # Detect fatigue
             if avg_recent_form < 60 and form_trend < -2:
@@ -197,9 +328,8 @@ class EnhancedSmartCoach:
                 self.fatigue_detected = False
         
         # Analyze rep rate
-        if len(self.rep_history) >= 5:
-            recent_reps = [t for t in self.rep_history if current_time - t < 60]
-            rep_rate = len(recent_reps)  # Reps per minute
+        if check_rep_rate and self._rep_n >= 5:
+            rep_rate = self._reps_last_minute(current_time)  # Reps per minute
             
             # Detect if going too fast
             if rep_rate > 20:  # More than 20 reps per minute
@@ -208,25 +338,24 @@ class EnhancedSmartCoach:
                 self.coaching_mode = "encouragement"
         
         # Detect rest needs
-        session_duration = current_time - self.session_start_time
         if (self.fatigue_detected or rep_count >= 15) and not self.rest_recommended:
             self.rest_recommended = True
             self.rest_start_time = current_time
     
-    def provide_coaching(self, form_score, rep_count, issues, recommendations):
+    def provide_coaching(self, current_time, form_score, rep_count, issues, recommendations):
         """Provide intelligent coaching based on current state"""
         
         # Rest coaching
         if self.rest_recommended and self.rest_start_time:
-            rest_duration = time.time() - self.rest_start_time
+            rest_duration = current_time - self.rest_start_time
             if rest_duration < self.recommended_rest_duration:
                 if rest_duration < 5:  # Just started rest
-                    self.say_coaching("Take a breather. You've earned it!")
+                    self.say_coaching("Take a breather. You've earned it!", current_time)
                 return
             else:
                 self.rest_recommended = False
                 self.rest_start_time = None
-                self.say_coaching("Rest complete! Ready for more?")
+                self.say_coaching("Rest complete! Ready for more?", current_time)
                 return
         
         # Form-based coaching
@@ -255,12 +384,14 @@ class EnhancedSmartCoach:
         if self.current_exercise in self.exercise_tips:
             exercise_tips = self.exercise_tips[self.current_exercise]
             
-            # Find specific advice for the issue
-            specific_advice = None
-            for issue_key, advice in exercise_tips["common_issues"].items():
-                if issue_key in primary_issue.lower():
-                    specific_advice = advice
-                    break
+            # Issues usually lead with their metric token, e.g. "knee_angle too
+            # shallow"; otherwise find any issue key the text mentions
+            issue_text = primary_issue.lower()
+            common_issues = exercise_tips["common_issues"]
+            specific_advice = common_issues.get(issue_text.partition(" ")[0])
+            if specific_advice is None:
+                specific_advice = next((advice for issue_key, advice in common_issues.items()
+                                        if issue_key in issue_text), None)
             
             if specific_advice:
                 self.say_coaching(specific_advice)
@@ -271,20 +402,14 @@ class EnhancedSmartCoach:
     
     def provide_improvement_coaching(self, issues, recommendations):
         """Provide coaching for moderate form issues"""
-        messages = [
-            "Good effort! Let's fine-tune that form.",
-            "You're on the right track. Small adjustments needed.",
-            "Almost there! Focus on the details."
-        ]
-        
         if recommendations:
             # Combine encouragement with specific advice
-            encouragement = random.choice(messages)
+            encouragement = random.choice(IMPROVEMENT_MESSAGES)
             advice = recommendations[0]
             full_message = f"{encouragement} {advice}"
             self.say_coaching(full_message)
         else:
-            self.say_coaching(random.choice(messages))
+            self.say_coaching(random.choice(IMPROVEMENT_MESSAGES))
     
     def provide_encouragement_coaching(self):
         """Provide positive reinforcement for good form"""
@@ -292,35 +417,26 @@ class EnhancedSmartCoach:
             encouragements = self.exercise_tips[self.current_exercise]["encouragement"]
             message = random.choice(encouragements)
         else:
-            general_encouragements = [
-                "Excellent form! Keep it up!",
-                "You're crushing it!",
-                "Perfect technique!",
-                "That's how it's done!",
-                "Strong work!"
-            ]
-            message = random.choice(general_encouragements)
+            message = random.choice(GENERAL_ENCOURAGEMENTS)
         
         self.say_coaching(message)
     
     def get_performance_summary(self):
         """Get a summary of the current workout session"""
-        if not self.form_history:
+        if not self._form_n:
             return "No data available yet."
         
         # Calculate statistics
-        all_scores = [score for _, score in self.form_history]
-        avg_form = np.mean(all_scores)
-        total_reps = len(self.rep_history)
-        session_duration = time.time() - self.session_start_time
+        avg_form = self._form_sum / self._form_n
+        total_reps = self._rep_n
+        session_duration = time.monotonic() - self.session_start_time
         
         # Rep rate
         rep_rate = (total_reps / session_duration) * 60 if session_duration > 0 else 0
         
         # Form trend
-        if len(all_scores) >= 5:
-            recent_scores = all_scores[-5:]
-            form_trend = np.polyfit(range(len(recent_scores)), recent_scores, 1)[0]
+        if self._form_n >= 5:
+            _, form_trend = ring_window_stats(self._form_scores, self._form_head, 5)
             trend_description = "improving" if form_trend > 0 else "declining" if form_trend < -1 else "stable"
         else:
             trend_description = "stable"
@@ -342,7 +458,7 @@ class EnhancedSmartCoach:
             "rep_rate": rep_rate,
             "form_trend": trend_description,
             "performance_level": performance_level,
-            "primary_exercise": max(set(self.exercise_history), key=self.exercise_history.count) if self.exercise_history else "unknown"
+            "primary_exercise": max(self._exercise_counts, key=self._exercise_counts.get) if self._exercise_counts else "unknown"
         }
         
         return summary
@@ -361,27 +477,24 @@ class EnhancedSmartCoach:
         else:
             message += "You maintained consistent form throughout."
         
+        # Speak the recap and the level-specific advice as one utterance
+        message += " " + SUMMARY_ADVICE[summary['performance_level']]
         self.say_coaching(message)
-        
-        # Provide specific advice based on performance
-        if summary['performance_level'] == "excellent":
-            self.say_coaching("Outstanding work! You're ready for more challenging variations.")
-        elif summary['performance_level'] == "good":
-            self.say_coaching("Solid session! Focus on consistency for continued improvement.")
-        elif summary['performance_level'] == "needs improvement":
-            self.say_coaching("Good effort! Practice with lighter weights or fewer reps to master the form.")
-        else:
-            self.say_coaching("Remember, quality over quantity. Focus on perfect form first.")
     
-    def say_coaching(self, message):
-        """Send coaching message to voice system"""
+    def say_coaching(self, message, current_time=None):
+        """Send coaching message to voice system, skipping an immediate repeat"""
+        if current_time is None:
+            current_time = time.monotonic()
+        if message == self._last_message and current_time - self._last_message_time < REPEAT_MESSAGE_WINDOW:
+            return
+        self._last_message = message
+        self._last_message_time = current_time
         print(f"[COACH] {message}")
         
         if self.voice_enabled:
-            try:
-                self.voice_queue.put(message, timeout=1)
-            except queue.Full:
-                print("[WARNING] Voice queue full, skipping message")
+            with self._voice_cv:
+                self._voice_messages.append(message)
+                self._voice_cv.notify()
     
     def give_specific_tip(self, exercise_type=None):
         """Give a specific tip for the current or specified exercise"""
@@ -392,22 +505,20 @@ class EnhancedSmartCoach:
             tip = random.choice(tips)
             self.say_coaching(f"Pro tip: {tip}")
         else:
-            general_tips = [
-                "Focus on controlled movements",
-                "Quality over quantity always",
-                "Breathe properly during each rep",
-                "Engage your core throughout",
-                "Listen to your body"
-            ]
-            tip = random.choice(general_tips)
+            tip = random.choice(GENERAL_TIPS)
             self.say_coaching(f"Remember: {tip}")
     
     def reset_session(self):
         """Reset for a new workout session"""
-        self.session_start_time = time.time()
-        self.form_history.clear()
-        self.rep_history.clear()
+        self.session_start_time = time.monotonic()
+        self._form_head = 0
+        self._form_n = 0
+        self._form_sum = 0.0
+        self._rep_head = 0
+        self._rep_n = 0
+        self._rep_window_n = 0
         self.exercise_history.clear()
+        self._exercise_counts.clear()
         self.fatigue_detected = False
         self.rest_recommended = False
         self.rest_start_time = None
@@ -419,7 +530,9 @@ class EnhancedSmartCoach:
     def cleanup(self):
         """Clean up resources"""
         if self.voice_enabled and self.voice_thread:
-            self.voice_queue.put("STOP")
+            with self._voice_cv:
+                self._voice_stop = True
+                self._voice_cv.notify()
             self.voice_thread.join(timeout=2)
         
         print("[INFO] Smart Coach cleanup completed")
@@ -428,37 +541,42 @@ class EnhancedSmartCoach:
 class SmartCoach(EnhancedSmartCoach):
     """Backward compatible wrapper for the original SmartCoach interface"""
     
-    def __init__(self):
-        super().__init__()
-        self.set_start_time = self.session_start_time
-        self.last_form_score = 100
-        self.resting = False
-        self.rest_start = None
-        
-        # Original tips for compatibility
-        self.tips = [
-            "Keep your core tight!",
-            "Don't rush the movement.",
-            "Widen your stance a bit.",
-            "Great job! Keep going!",
-            "Focus on form, not speed."
-        ]
-    
-    def update(self, form_score, reps):
-        """Original update method signature for backward compatibility"""
-        # Map to enhanced update method
-        super().update(form_score, reps, self.current_exercise)
-        
-        # Update legacy attributes
-        self.last_form_score = form_score
-        
-        # Legacy rest detection
-        if self.rest_recommended and not self.resting:
-            self.resting = True
-            self.rest_start = time.time()
-        elif not self.rest_recommended and self.resting:
-            self.resting = False
-            self.rest_start = None
+    __slots__ = ()
+    
+    # Original tips for compatibility
+    tips = (
+        "Keep your core tight!",
+        "Don't rush the movement.",
+        "Widen your stance a bit.",
+        "Great job! Keep going!",
+        "Focus on form, not speed."
+    )
+    
+    # Legacy attribute names, read straight from the state the base class maintains.
+    # The base class times with time.monotonic(); the legacy timestamps stay in
+    # epoch seconds so callers can keep comparing them with time.time()
+    @staticmethod
+    def _to_wall_clock(timestamp):
+        """Convert a time.monotonic() reading to epoch seconds, passing None through"""
+        if timestamp is None:
+            return None
+        return time.time() - (time.monotonic() - timestamp)
+    
+    @property
+    def set_start_time(self):
+        return self._to_wall_clock(self.session_start_time)
+    
+    @property
+    def last_form_score(self):
+        return self._last_form_score
+    
+    @property
+    def resting(self):
+        return self.rest_recommended
+    
+    @property
+    def rest_start(self):
+        return self._to_wall_clock(self.rest_start_time)
     
     def give_tip(self):
         """Original give_tip method for backward compatibility"""
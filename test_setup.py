@@ -55,8 +55,8 @@ def test_mediapipe():
             min_detection_confidence=0.5
         )
         
-        # Create a dummy image
-        dummy_image = np.zeros((480, 640, 3), dtype=np.uint8)
+        # A small dummy image exercises the same graph as a full frame
+        dummy_image = np.zeros((64, 64, 3), dtype=np.uint8)
         
         # Process the image
         results = pose.process(dummy_image)
@@ -168,9 +168,14 @@ def test_opencv():
     
     try:
         import cv2
+        import numpy as np
+        
+        # Test basic OpenCV functionality on an in-memory image, no file I/O
+        gray = cv2.cvtColor(np.zeros((2, 2, 3), dtype=np.uint8), cv2.COLOR_BGR2GRAY)
+        if gray.shape != (2, 2):
+            print(f"❌ OpenCV test failed: unexpected output shape {gray.shape}")
+            return False
         
-        # Test basic OpenCV functionality
-        img = cv2.imread('test_setup.py')  # This will fail, but we're testing import
         print("✅ OpenCV working")
         return True
         
@@ -3,29 +3,25 @@ Test suite for AI Fitness Coach application
 """
 
 import pytest
+import io
 import json
 import os
-import tempfile
+import uuid
 from unittest.mock import patch, MagicMock
 from app import app, analyzer, allowed_file
 
-@pytest.fixture
-def client():
-    """Create test client"""
+@pytest.fixture(scope='session')
+def client(tmp_path_factory):
+    """Create test client shared by the whole session"""
     app.config['TESTING'] = True
-    app.config['UPLOAD_FOLDER'] = tempfile.mkdtemp()
+    app.config['UPLOAD_FOLDER'] = str(tmp_path_factory.mktemp('uploads'))
     with app.test_client() as client:
         yield client
 
 @pytest.fixture
 def sample_video():
-    """Create a sample video file for testing"""
-    # Create a temporary video file
-    temp_file = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
-    temp_file.write(b'fake video content')
-    temp_file.close()
-    yield temp_file.name
-    os.unlink(temp_file.name)
+    """Create an in-memory sample video upload"""
+    return io.BytesIO(b'fake video content'), 'test.mp4'
 
 class TestApp:
     """Test cases for the main application"""
@@ -84,10 +80,9 @@ class TestApp:
             'frames_analyzed': 100
         }
         
-        with open(sample_video, 'rb') as video_file:
-            response = client.post('/upload', 
-                                 data={'video': (video_file, 'test.mp4')},
-                                 content_type='multipart/form-data')
+        response = client.post('/upload', 
+                             data={'video': sample_video},
+                             content_type='multipart/form-data')
         
         assert response.status_code == 200
         data = json.loads(response.data)
@@ -104,21 +99,13 @@ class TestApp:
     
     def test_upload_invalid_file_type(self, client):
         """Test upload with invalid file type"""
-        temp_file = tempfile.NamedTemporaryFile(suffix='.txt', delete=False)
-        temp_file.write(b'not a video')
-        temp_file.close()
+        response = client.post('/upload',
+                             data={'video': (io.BytesIO(b'not a video'), 'test.txt')},
+                             content_type='multipart/form-data')
         
-        try:
-            with open(temp_file.name, 'rb') as file:
-                response = client.post('/upload',
-                                     data={'video': (file, 'test.txt')},
-                                     content_type='multipart/form-data')
-            
-            assert response.status_code == 400
-            data = json.loads(response.data)
-            assert 'error' in data
-        finally:
-            os.unlink(temp_file.name)
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert 'error' in data
     
     def test_get_results_not_found(self, client):
         """Test getting results for non-existent ID"""
@@ -126,6 +113,28 @@ class TestApp:
         assert response.status_code == 404
         data = json.loads(response.data)
         assert 'error' in data
+    
+    def test_api_results_legacy_file(self, client):
+        """Test that bare results files are served in the response envelope"""
+        session_id = str(uuid.uuid4())
+        results_file = f"static/results/{session_id}.json"
+        os.makedirs('static/results', exist_ok=True)
+        with open(results_file, 'w') as f:
+            json.dump({'exercise_detected': 'squat', 'overall_score': 80}, f)
+        
+        try:
+            response = client.get(f'/api/v1/results/{session_id}')
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert data['success'] == True
+            assert data['session_id'] == session_id
+            assert data['results']['exercise_detected'] == 'squat'
+            
+            # The stored file is left untouched
+            with open(results_file) as f:
+                assert json.load(f) == {'exercise_detected': 'squat', 'overall_score': 80}
+        finally:
+            os.remove(results_file)
 
 class TestVideoAnalyzer:
     """Test cases for the VideoAnalyzer class"""
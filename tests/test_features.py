@@ -7,6 +7,7 @@ import unittest
 import numpy as np
 import sys
 import os
+from types import SimpleNamespace
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,7 +17,10 @@ from features import (
     detect_exercise_type,
     analyze_form_quality,
     calculate_angle,
-    AdvancedFeatureExtractor
+    AdvancedFeatureExtractor,
+    ANGLE_NAMES,
+    FEATURE_INDEX,
+    HISTORY_LENGTH
 )
 
 class TestFeatureExtraction(unittest.TestCase):
@@ -26,21 +30,20 @@ class TestFeatureExtraction(unittest.TestCase):
         """Set up test fixtures"""
         self.extractor = AdvancedFeatureExtractor()
         
-        # Create mock landmarks
-        self.mock_landmarks = []
-        for i in range(33):
-            # Create realistic pose positions
-            if i < 11:  # Head
-                x, y = 0.5 + np.random.normal(0, 0.05), 0.2 + np.random.normal(0, 0.05)
-            elif i < 23:  # Upper body
-                x, y = 0.5 + np.random.normal(0, 0.1), 0.4 + np.random.normal(0, 0.1)
-            else:  # Lower body
-                x, y = 0.5 + np.random.normal(0, 0.1), 0.7 + np.random.normal(0, 0.1)
-            
-            landmark = type('Landmark', (), {
-                'x': x, 'y': y, 'z': 0.0, 'visibility': 0.8 + np.random.normal(0, 0.1)
-            })()
-            self.mock_landmarks.append(landmark)
+        # Create mock landmarks at realistic pose positions: head, upper body
+        # and lower body, drawing all the noise at once
+        index = np.arange(33)
+        centers = np.column_stack((
+            np.full(33, 0.5),
+            np.select([index < 11, index < 23], [0.2, 0.4], 0.7),
+            np.full(33, 0.8)
+        ))
+        position_scale = np.where(index < 11, 0.05, 0.1)
+        scales = np.column_stack((position_scale, position_scale, np.full(33, 0.1)))
+        values = centers + np.random.default_rng(0).normal(0.0, scales)
+        
+        self.mock_landmarks = [SimpleNamespace(x=x, y=y, z=0.0, visibility=visibility)
+                               for x, y, visibility in values.tolist()]
     
     def test_angle_calculation(self):
         """Test angle calculation function"""
@@ -165,12 +168,44 @@ class TestAdvancedFeatureExtractor(unittest.TestCase):
     
     def test_angle_history(self):
         """Test angle history tracking"""
-        self.extractor.angle_history.append(90)
-        self.extractor.angle_history.append(85)
-        
-        self.assertEqual(len(self.extractor.angle_history), 2)
-        self.assertEqual(self.extractor.angle_history[0], 90)
-        self.assertEqual(self.extractor.angle_history[1], 85)
+        self.extractor.push_angles(np.full(len(ANGLE_NAMES), 90.0))
+        self.extractor.push_angles(np.full(len(ANGLE_NAMES), 85.0))
+        
+        self.assertEqual(self.extractor.count, 2)
+        np.testing.assert_array_equal(self.extractor.angle_ring[0], 90.0)
+        np.testing.assert_array_equal(self.extractor.angle_ring[1], 85.0)
+        
+        # The ring wraps around once it is full
+        for _ in range(HISTORY_LENGTH):
+            self.extractor.push_angles(np.zeros(len(ANGLE_NAMES)))
+        self.assertEqual(self.extractor.count, HISTORY_LENGTH)
+        self.assertEqual(self.extractor.head, 2)
+    
+    def test_static_pose_reuse(self):
+        """Test that near-identical frames reuse the last computed features"""
+        landmarks = np.random.default_rng(0).uniform(0.2, 0.8, (33, 3))
+        features, _ = self.extractor.extract(landmarks, (480, 640, 3))
+        knee_angle = features[0]
+        
+        # Sub-pixel jitter reuses the cached features
+        features, _ = self.extractor.extract(landmarks + 1e-4, (480, 640, 3))
+        self.assertEqual(self.extractor._reused, 1)
+        self.assertEqual(features[0], knee_angle)
+        # A held pose reports no movement
+        self.assertEqual(features[FEATURE_INDEX['right_knee_angle_velocity']], 0.0)
+        self.assertEqual(features[FEATURE_INDEX['right_knee_angle_is_fast']], 0.0)
+        
+        # A visibility change forces a recomputation
+        dimmed = landmarks.copy()
+        dimmed[:, 2] -= 0.1
+        self.extractor.extract(dimmed, (480, 640, 3))
+        self.assertEqual(self.extractor._reused, 0)
+        
+        # A real movement forces a recomputation
+        moved = landmarks.copy()
+        moved[:, 0] += 0.1
+        self.extractor.extract(moved, (480, 640, 3))
+        self.assertEqual(self.extractor._reused, 0)
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Unit tests for smart_coach module
+Testing the coach's ring-buffer history and fatigue detection
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smart_coach import EnhancedSmartCoach, FORM_HISTORY_SIZE
+
+class TestSmartCoach(unittest.TestCase):
+    """Test coach state tracking"""
+    
+    def setUp(self):
+        """Set up a silent coach"""
+        self.coach = EnhancedSmartCoach(voice_enabled=False)
+    
+    def test_slow_decline_triggers_fatigue(self):
+        """Test that a gradual form decline without new reps still detects fatigue"""
+        for i in range(20):
+            self.coach.update(75 - 2.5 * i, 3, 'squat', issues=[])
+        
+        self.assertTrue(self.coach.fatigue_detected)
+        self.assertTrue(self.coach.rest_recommended)
+    
+    def test_form_history_wraps(self):
+        """Test that the form ring keeps a running sum of the newest scores only"""
+        scores = list(range(FORM_HISTORY_SIZE + 30))
+        for score in scores:
+            self.coach._push_form(score)
+        
+        recent = scores[-FORM_HISTORY_SIZE:]
+        self.assertEqual(self.coach._form_n, FORM_HISTORY_SIZE)
+        self.assertAlmostEqual(self.coach._form_sum, sum(recent))
+        self.assertEqual(self.coach.get_performance_summary()["form_trend"], "improving")
+    
+    def test_reps_last_minute(self):
+        """Test that reps older than a minute leave the rate window"""
+        for timestamp in (0.0, 10.0, 50.0, 65.0):
+            self.coach._push_rep(timestamp)
+        
+        self.assertEqual(self.coach._reps_last_minute(65.0), 3)
+        self.assertEqual(self.coach._reps_last_minute(115.0), 1)
+        self.assertEqual(self.coach._rep_n, 4)
+    
+    def test_exercise_counts_follow_evictions(self):
+        """Test that the exercise histogram matches the bounded history"""
+        for exercise in ['squat'] * 15 + ['push_up'] * 12:
+            self.coach._push_exercise(exercise)
+        self.coach._push_form(80)
+        
+        history = list(self.coach.exercise_history)
+        self.assertEqual(self.coach._exercise_counts,
+                         {name: history.count(name) for name in set(history)})
+        self.assertEqual(self.coach.get_performance_summary()["primary_exercise"], "push_up")
+    
+    def test_correction_advice_lookup(self):
+        """Test that correction advice matches issue keys case-insensitively anywhere in the issue"""
+        cases = (
+            ('squat', "knee_angle too shallow", "Focus on proper depth - thighs parallel to ground"),
+            ('squat', "Knee_angle too shallow", "Focus on proper depth - thighs parallel to ground"),
+            ('push_up', "knee_symmetry uneven", "Keep body aligned"),
+            ('push_up', "wrist pain", "Go lower"),
+        )
+        for exercise, issue, expected in cases:
+            self.coach.current_exercise = exercise
+            with patch.object(EnhancedSmartCoach, 'say_coaching') as say:
+                self.coach.provide_correction_coaching([issue], ["Go lower"])
+            say.assert_called_once_with(expected)
+    
+    def test_update_keeps_exercise_by_default(self):
+        """Test that updates without an exercise keep the current one"""
+        self.coach.update(80, 1, 'squat')
+        self.coach.update(80, 2)
+        self.assertEqual(self.coach.current_exercise, 'squat')
+
+if __name__ == '__main__':
+    unittest.main()
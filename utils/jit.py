@@ -0,0 +1,19 @@
+"""
+JIT compilation utilities for AI Fitness Coach
+Numba njit with a pure-Python fallback
+"""
+
+# Import numba with fallback to plain Python
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit, usable with or without arguments"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+    
+    prange = range
@@ -3,15 +3,27 @@ Logging utilities for AI Fitness Coach
 Comprehensive logging system with different levels and handlers
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import threading
 from datetime import datetime
 from typing import Optional
-import json
 from functools import wraps
 import time
 
+from utils.serialization import dumps
+
+# Import psutil with fallback for memory monitoring
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
 class FitnessCoachLogger:
     """Custom logger for AI Fitness Coach"""
     
@@ -33,11 +45,10 @@ class FitnessCoachLogger:
         )
         console_handler.setFormatter(console_formatter)
         
-        # File handler
-        if not os.path.exists('logs'):
-            os.makedirs('logs')
+        # File handlers open their files on the first record they write
+        os.makedirs('logs', exist_ok=True)
         
-        file_handler = logging.FileHandler('logs/fitness_coach.log')
+        file_handler = logging.FileHandler('logs/fitness_coach.log', delay=True)
         file_handler.setLevel(logging.DEBUG)
         file_formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
@@ -45,43 +56,58 @@ class FitnessCoachLogger:
         file_handler.setFormatter(file_formatter)
         
         # Error file handler
-        error_handler = logging.FileHandler('logs/errors.log')
+        error_handler = logging.FileHandler('logs/errors.log', delay=True)
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(file_formatter)
         
-        # Add handlers
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(error_handler)
+        # Callers only enqueue records; a background listener formats and writes them
+        log_queue = queue.SimpleQueue()
+        self.listener = logging.handlers.QueueListener(
+            log_queue, console_handler, file_handler, error_handler,
+            respect_handler_level=True
+        )
+        self.listener.start()
+        atexit.register(self.listener.stop)
+        
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
-    def info(self, message: str, **kwargs):
-        """Log info message"""
-        self.logger.info(message, extra=kwargs)
+    def is_enabled_for(self, level: int) -> bool:
+        """Check whether messages at the given level would be emitted"""
+        return self.logger.isEnabledFor(level)
     
-    def debug(self, message: str, **kwargs):
-        """Log debug message"""
-        self.logger.debug(message, extra=kwargs)
+    def info(self, message: str, *args, **kwargs):
+        """Log info message, %-formatting args only if it is emitted"""
+        self.logger.info(message, *args, extra=kwargs)
     
-    def warning(self, message: str, **kwargs):
-        """Log warning message"""
-        self.logger.warning(message, extra=kwargs)
+    def debug(self, message: str, *args, **kwargs):
+        """Log debug message, %-formatting args only if it is emitted"""
+        self.logger.debug(message, *args, extra=kwargs)
     
-    def error(self, message: str, **kwargs):
-        """Log error message"""
-        self.logger.error(message, extra=kwargs)
+    def warning(self, message: str, *args, **kwargs):
+        """Log warning message, %-formatting args only if it is emitted"""
+        self.logger.warning(message, *args, extra=kwargs)
     
-    def critical(self, message: str, **kwargs):
-        """Log critical message"""
-        self.logger.critical(message, extra=kwargs)
+    def error(self, message: str, *args, **kwargs):
+        """Log error message, %-formatting args only if it is emitted"""
+        self.logger.error(message, *args, extra=kwargs)
+    
+    def critical(self, message: str, *args, **kwargs):
+        """Log critical message, %-formatting args only if it is emitted"""
+        self.logger.critical(message, *args, extra=kwargs)
+    
+    def log_json(self, level: int, message: str, data: dict, *args):
+        """Log a %-style message followed by data serialized to compact JSON once"""
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, message + " %s", *args, dumps(data, default=str).decode())
     
     def log_analysis(self, analysis_data: dict):
         """Log analysis results"""
-        self.info("Analysis completed", analysis_data=analysis_data)
+        self.log_json(logging.INFO, "Analysis completed", analysis_data)
     
     def log_performance(self, operation: str, duration: float, **kwargs):
         """Log performance metrics"""
-        self.info(f"Performance: {operation} took {duration:.2f}s", 
-                 operation=operation, duration=duration, **kwargs)
+        self.info("Performance: %s took %.2fs", operation, duration,
+                  operation=operation, duration=duration, **kwargs)
     
     def log_error_with_context(self, error: Exception, context: dict = None):
         """Log error with additional context"""
@@ -90,7 +116,7 @@ class FitnessCoachLogger:
             'error_message': str(error),
             'context': context or {}
         }
-        self.error(f"Error occurred: {error}", error_data=error_data)
+        self.log_json(logging.ERROR, "Error occurred: %s", error_data, error)
 
 # Global logger instance
 logger = FitnessCoachLogger()
@@ -99,19 +125,23 @@ def log_function_call(func):
     """Decorator to log function calls"""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        logger.debug(f"Calling {func.__name__}", 
-                    args_count=len(args), kwargs_count=len(kwargs))
+        start_time = time.perf_counter()
+        # Skip building debug messages unless they would be emitted
+        debug = logger.is_enabled_for(logging.DEBUG)
+        if debug:
+            logger.debug("Calling %s", func.__name__,
+                         args_count=len(args), kwargs_count=len(kwargs))
         
         try:
             result = func(*args, **kwargs)
-            duration = time.time() - start_time
-            logger.debug(f"Function {func.__name__} completed in {duration:.2f}s")
+            if debug:
+                duration = time.perf_counter() - start_time
+                logger.debug("Function %s completed in %.2fs", func.__name__, duration)
             return result
         except Exception as e:
-            duration = time.time() - start_time
-            logger.error(f"Function {func.__name__} failed after {duration:.2f}s", 
-                        error=str(e))
+            duration = time.perf_counter() - start_time
+            logger.error("Function %s failed after %.2fs", func.__name__, duration,
+                         error=str(e))
             raise
     
     return wrapper
@@ -127,37 +157,37 @@ def log_analysis_session(session_id: str, exercise_type: str, duration: float,
         'score': score,
         'timestamp': datetime.now().isoformat()
     }
-    logger.info("Analysis session completed", session_data=session_data)
+    logger.log_json(logging.INFO, "Analysis session completed", session_data)
 
 class PerformanceMonitor:
     """Monitor and log performance metrics"""
     
     def __init__(self):
+        # (operation, thread id) -> perf_counter_ns() start time; keying by
+        # thread keeps concurrent requests timing the same operation apart
         self.metrics = {}
+        self.process = psutil.Process() if PSUTIL_AVAILABLE else None
     
     def start_timer(self, operation: str):
-        """Start timing an operation"""
-        self.metrics[operation] = {'start': time.time()}
+        """Start timing an operation on the calling thread"""
+        self.metrics[operation, threading.get_ident()] = time.perf_counter_ns()
     
     def end_timer(self, operation: str) -> float:
-        """End timing an operation and return duration"""
-        if operation in self.metrics:
-            duration = time.time() - self.metrics[operation]['start']
-            logger.log_performance(operation, duration)
-            del self.metrics[operation]
-            return duration
-        return 0.0
+        """End timing the calling thread's operation and return duration"""
+        start = self.metrics.pop((operation, threading.get_ident()), None)
+        if start is None:
+            return 0.0
+        duration = (time.perf_counter_ns() - start) * 1e-9
+        logger.log_performance(operation, duration)
+        return duration
     
     def log_memory_usage(self):
         """Log current memory usage"""
-        try:
-            import psutil
-            process = psutil.Process()
-            memory_info = process.memory_info()
-            logger.info("Memory usage", 
-                       memory_mb=memory_info.rss / 1024 / 1024)
-        except ImportError:
+        if self.process is None:
             logger.debug("psutil not available for memory monitoring")
+            return
+        memory_mb = self.process.memory_info().rss / (1 << 20)
+        logger.info("Memory usage: %.1f MB", memory_mb, memory_mb=memory_mb)
 
 # Global performance monitor
 performance_monitor = PerformanceMonitor() 
\ No newline at end of file
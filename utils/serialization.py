@@ -0,0 +1,80 @@
+"""
+Serialization utilities for AI Fitness Coach
+Fast JSON encoding with orjson and a stdlib fallback
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Any, Callable, Optional, Tuple
+
+from flask import current_app, request
+
+# Import orjson with fallback to stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    _INDENT_OPTIONS = _OPTIONS | orjson.OPT_INDENT_2
+
+def _default(obj: Any) -> Any:
+    """Encode numpy scalars and arrays when falling back to stdlib json"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj: Any, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serialize an object to JSON bytes, encoding unsupported types with default if given"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=default, option=_INDENT_OPTIONS if indent else _OPTIONS)
+    return json.dumps(obj, default=default or _default, indent=2 if indent else None).encode('utf-8')
+
+def loads(data: Any) -> Any:
+    """Deserialize JSON bytes or str"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dump_file(obj: Any, path: str, indent: bool = True) -> None:
+    """Write JSON (or pre-encoded bytes) to a temp file and atomically publish it at path
+    
+    Each call writes its own uniquely named temp file, so concurrent writers
+    to the same path never publish each other's partial output.
+    """
+    directory, name = os.path.split(path)
+    data = obj if isinstance(obj, bytes) else dumps(obj, indent=indent)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=directory or None)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # mkstemp creates owner-only files; publish with the usual permissions
+            os.fchmod(f.fileno(), 0o644)
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def json_response(payload: Any, status: int = 200):
+    """Build a JSON response from pre-encoded bytes instead of jsonify"""
+    body = payload if isinstance(payload, bytes) else dumps(payload)
+    return current_app.response_class(body, status=status,
+                                      mimetype='application/json')
+
+def static_json(payload: Any) -> Tuple[bytes, str]:
+    """Pre-encode a constant payload and derive its ETag once"""
+    body = dumps(payload)
+    return body, hashlib.blake2b(body, digest_size=8).hexdigest()
+
+def cached_json_response(body: bytes, etag: str):
+    """Serve a pre-encoded constant body, answering 304 to matching ETags"""
+    response = json_response(body)
+    response.set_etag(etag)
+    return response.make_conditional(request)